@@ -5,23 +5,35 @@ import uuid
 from datetime import datetime
 import boto3
 from decouple import config
-import os
-from django.conf import settings
 import re
+import requests
+from django.conf import settings
 from django.core.cache import cache  # <-- ADDED FOR CACHING
 
 # Import from the parent 'api' directory
 from .. import dynamodb_handler
-from ..image_generator import InstagramPostGenerator, InstagramPostError
 
-# Import from the local 'views' directory
-from .instagram_uploader import upload_to_instagram
+# Image generation and publishing are shared with the posts app
+from apps.posts.services.image_generator import InstagramPostGenerator, InstagramPostError
+from apps.posts.services.instagram_uploader import publish_to_instagram
+from apps.posts.services.rate_limiter import instagram_publish_bucket
 
 # S3 Configuration
 S3_BUCKET_NAME = config('S3_BUCKET_NAME')
 S3_REGION = config('AWS_REGION_NAME')
 s3_client = boto3.client('s3', region_name=S3_REGION)
 
+# Kept from the legacy uploader this view used to have: it published with the env page token
+# (not the GlobalSettings token the posts app uses) and gave up on container processing after
+# 30s, since the whole publish runs inside this request.
+LEGACY_PROCESSING_TIMEOUT = 30
+
+DEFAULT_SUFFIX = """#surrey #loudsurrey #surreybc #surreybc #punjabi #canadapunjabi #punjabtocanada #internationalstudents #surreylife #desivibes #punjabiwedding #studyincanada #chardikala
+─────────────────────────
+This content was shared anonymously on LoudSurrey
+─────────────────────────
+Disclaimer: We are not the creators of this content and are not responsible for any damage caused by it."""
+
 # --- NEW CACHING LOGIC FOR BLOCKED WORDS ---
 BLOCKED_WORDS_CACHE_KEY = "blocked_words_set"
 CACHE_TIMEOUT_SECONDS = 3600  # 1 hour
@@ -117,6 +129,17 @@ class PostListView(APIView):
             if not is_valid_length or not is_valid_chars:
                 username = 'Anonymous'
 
+        # This endpoint publishes synchronously, so it draws on the same Graph publishing quota
+        # as the Celery pipeline. Check it before a post number, image or S3 object is spent.
+        allowed, wait = instagram_publish_bucket.acquire()
+        if not allowed:
+            response = Response(
+                {'error': 'Posting limit reached. Please try again later.'},
+                status=status.HTTP_429_TOO_MANY_REQUESTS
+            )
+            response['Retry-After'] = str(int(wait) + 1)
+            return response
+
         one_year_in_seconds = 31_536_000
         
         response_data = None
@@ -125,7 +148,6 @@ class PostListView(APIView):
         
         post_id = str(uuid.uuid4())
         file_name = f"{post_id}.png"
-        output_path = None
 
         try:
             post_num = dynamodb_handler.increment_post_counter()
@@ -133,33 +155,37 @@ class PostListView(APIView):
                 raise Exception("Failed to get post number from counter.")
 
             formatted_date = datetime.now().strftime('%d %b')
-            
-            temp_dir = os.path.join(settings.BASE_DIR, "temp_images")
-            os.makedirs(temp_dir, exist_ok=True)
-            output_path = os.path.join(temp_dir, file_name)
 
             generator = InstagramPostGenerator(
                 username=username,
-                post_id=f"#{post_num}",
+                post_id=str(post_num),
                 message=text,
                 short_date=formatted_date,
                 title="Loud Surrey",
             )
-            generator.generate_image(output_path)
-
-            with open(output_path, 'rb') as f:
-                s3_client.upload_fileobj(
-                    Fileobj=f,
-                    Bucket=S3_BUCKET_NAME,
-                    Key=file_name,
-                    ExtraArgs={'ContentType': 'image/png', 'ACL': 'public-read'}
-                )
-            
-            image_url = f"https://{S3_BUCKET_NAME}.s3.{S3_REGION}.amazonaws.com/{file_name}"
+            image_buffer = generator.generate_image()
 
-            instagram_media_id = upload_to_instagram(image_url=image_url, caption=text)
+            s3_client.upload_fileobj(
+                Fileobj=image_buffer,
+                Bucket=S3_BUCKET_NAME,
+                Key=file_name,
+                ExtraArgs={'ContentType': 'image/png', 'ACL': 'public-read'}
+            )
+            
+            image_url = f"https://{settings.AWS_S3_CUSTOM_DOMAIN}/{file_name}"
+
+            try:
+                result = publish_to_instagram(
+                    image_url,
+                    f"{text}\n\n{DEFAULT_SUFFIX}",
+                    access_token=settings.ACCESS_TOKEN,
+                    processing_timeout=LEGACY_PROCESSING_TIMEOUT,
+                )
+            except requests.RequestException as e:
+                print(f"Instagram API Error: {e}")
+                result = {'success': False}
             
-            if not instagram_media_id:
+            if not result['success']:
                 print(f"Critical: Post {post_id} failed to upload to Instagram. Aborting save.")
                 response_data = {'error': 'Image was created but failed to upload to Instagram. Check server logs.'}
                 response_status = status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -172,9 +198,6 @@ class PostListView(APIView):
             print(f"Error during image processing or S3 upload: {e}")
             response_data = {'error': 'Failed to generate or upload image.'}
             response_status = status.HTTP_500_INTERNAL_SERVER_ERROR
-        finally:
-            if output_path and os.path.exists(output_path):
-                os.remove(output_path)
 
         if response_data is None:
             ip_address = request.META.get('HTTP_X_FORWARDED_FOR', request.META.get('REMOTE_ADDR')).split(',')[0]
@@ -79,6 +79,7 @@ class GlobalSettings(SingletonModel):
         # When settings are saved, clear the cache to ensure the app
         # fetches the updated values.
         cache.delete('global_settings')
+        cache.delete('ig_access_token')
         super().save(*args, **kwargs)
 
 # ==============================================================================
@@ -104,4 +105,11 @@ class BlockedWord(models.Model):
         # Ensure the word is always saved in lowercase to prevent duplicates
         # and simplify lookups.
         self.word = self.word.lower()
-        super().save(*args, **kwargs)
\ No newline at end of file
+        super().save(*args, **kwargs)
+        # New version token, so check_for_blocked_words rebuilds its automaton
+        cache.delete('blocked_words_version')
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        cache.delete('blocked_words_version')
+        return result
\ No newline at end of file
@@ -0,0 +1,14 @@
+# apps/core/services/redis_client.py
+
+import redis
+from functools import lru_cache
+from django.conf import settings
+
+@lru_cache(maxsize=None)
+def get_redis():
+    """
+    Returns a process-wide Redis client on the Celery broker instance, for shared
+    counters and limiters that must agree across web and worker processes.
+    redis-py resets its connection pool after a fork, so this is safe in prefork workers.
+    """
+    return redis.Redis.from_url(settings.CELERY_BROKER_URL)
@@ -2,6 +2,8 @@
 
 import os
 import json
+import uuid
+import ahocorasick
 import requests
 from dataclasses import dataclass, asdict
 from django.core.cache import cache
@@ -26,22 +28,52 @@ class LLMAnalysisResult:
         return asdict(self)
 
 
+# Bumped (deleted and re-minted) whenever a BlockedWord is saved or deleted
+BLOCKED_WORDS_VERSION_KEY = 'blocked_words_version'
+BLOCKED_WORDS_VERSION_TIMEOUT = 3600
+
+# (version, automaton) for this process; rebuilt only when the version token changes
+_blocked_automaton = (None, None)
+
+
+def _build_blocked_automaton(blocked_words):
+    """
+    Builds an Aho-Corasick automaton over the blocked words. A check is then one
+    linear pass over the text, however many words are blocked.
+    """
+    words = [word for word in blocked_words if word]
+    if not words:
+        return None
+    automaton = ahocorasick.Automaton()
+    for word in words:
+        automaton.add_word(word, word)
+    automaton.make_automaton()
+    return automaton
+
+
+def _blocked_words_version():
+    """Returns the current word-list version token, minting one if none is cached."""
+    version = cache.get(BLOCKED_WORDS_VERSION_KEY)
+    if version is None:
+        cache.add(BLOCKED_WORDS_VERSION_KEY, uuid.uuid4().hex, timeout=BLOCKED_WORDS_VERSION_TIMEOUT)
+        version = cache.get(BLOCKED_WORDS_VERSION_KEY)
+    return version
+
+
 def check_for_blocked_words(text: str) -> bool:
     """
     Checks if the given text contains any blocked words from the database.
-    Uses caching for performance.
+    Each call only compares a short version token; the words are re-read and the
+    automaton rebuilt when the token changes (a BlockedWord edit, or hourly expiry).
     """
-    cache_key = 'blocked_words_set'
-    blocked_words = cache.get(cache_key)
-    if blocked_words is None:
-        blocked_words = set(BlockedWord.objects.values_list('word', flat=True))
-        cache.set(cache_key, blocked_words, timeout=3600)
-
-    text_lower = text.lower()
-    for word in blocked_words:
-        if word in text_lower:
-            return True
-    return False
+    global _blocked_automaton
+    version = _blocked_words_version()
+    built_version, automaton = _blocked_automaton
+    if built_version != version:
+        automaton = _build_blocked_automaton(BlockedWord.objects.values_list('word', flat=True))
+        _blocked_automaton = (version, automaton)
+
+    return automaton is not None and next(automaton.iter(text.lower()), None) is not None
 
 
 # --- STEP 2: UPDATED analyze_with_llm FUNCTION ---
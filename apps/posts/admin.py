@@ -1,23 +1,38 @@
 # apps/posts/admin.py
 
 from django.contrib import admin, messages
+from django.contrib.postgres.search import SearchQuery
 from django import forms
 from django.utils.html import format_html
 from django.utils import timezone
 from django.db import transaction  # Import transaction
 from datetime import timedelta
+from itertools import islice
 import re
 
-from .models import Post, PostImage
+from celery import group
+
+from .models import Post, PostImage, PostModerationLog
 from .tasks import process_and_publish_post
 from apps.users.models import User
 
+RETRY_CHUNK_SIZE = 500
+
 class PostImageInline(admin.TabularInline):
     model = PostImage
     extra = 0
     readonly_fields = ('id', 'image_url', 'is_text_image', 'created_at')
     can_delete = False
 
+class PostModerationLogInline(admin.StackedInline):
+    model = PostModerationLog
+    extra = 0
+    readonly_fields = ('raw_data', 'created_at')
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
 # --- Custom Widget for "Select or Type" functionality ---
 class DatalistTextInput(forms.TextInput):
     def __init__(self, datalist_options=None, *args, **kwargs):
@@ -88,20 +103,41 @@ class PostAdminForm(forms.ModelForm):
         self.fields['user_identifier'].widget = DatalistTextInput(datalist_options=user_options)
 
 
+_STATUS_COLORS = {
+    Post.PostStatus.POSTED: "green",
+    Post.PostStatus.SCHEDULED: "purple",
+    Post.PostStatus.PENDING_MODERATION: "orange",
+    Post.PostStatus.AWAITING_PAYMENT: "orange",
+    Post.PostStatus.FAILED: "red",
+}
+
+# The badge depends only on the status value, so render each one once at import
+# instead of running format_html for every changelist row.
+_STATUS_HTML = {
+    status.value: format_html('<b style="color: {};">{}</b>', _STATUS_COLORS.get(status, "blue"), status.label)
+    for status in Post.PostStatus
+}
+
+
 @admin.action(description="🔄 Retry publishing selected posts")
 def retry_failed_posts(modeladmin, request, queryset):
+    # Don't retry if already posted! Ids are streamed in chunks so a large selection
+    # never gets loaded into memory, and each chunk is reset with a single UPDATE.
+    eligible_ids = (
+        queryset.exclude(status=Post.PostStatus.POSTED)
+        .values_list('id', flat=True)
+        .iterator(chunk_size=RETRY_CHUNK_SIZE)
+    )
     count = 0
-    for post in queryset:
-        # Don't retry if already posted!
-        if post.status == Post.PostStatus.POSTED:
-            continue
-            
-        post.status = Post.PostStatus.PROCESSING
-        post.meta_api_error = None
-        post.save()
+    for chunk in iter(lambda: list(islice(eligible_ids, RETRY_CHUNK_SIZE)), []):
+        Post.objects.filter(id__in=chunk).update(
+            status=Post.PostStatus.PROCESSING, meta_api_error=None
+        )
         # Use on_commit to prevent race conditions
-        transaction.on_commit(lambda p=post.id: process_and_publish_post.delay(p))
-        count += 1
+        transaction.on_commit(
+            lambda ids=chunk: group(process_and_publish_post.s(pid) for pid in ids).apply_async()
+        )
+        count += len(chunk)
     
     if count > 0:
         modeladmin.message_user(request, f"Successfully queued {count} post(s) for retry.", messages.SUCCESS)
@@ -112,19 +148,35 @@ def retry_failed_posts(modeladmin, request, queryset):
 @admin.register(Post)
 class PostAdmin(admin.ModelAdmin):
     form = PostAdminForm
-    inlines = [PostImageInline]
+    inlines = [PostImageInline, PostModerationLogInline]
     actions = [retry_failed_posts]
     
     list_display = ('post_number', 'user', 'get_status_display_colored', 'scheduled_time', 'created_at', 'is_promotional')
     list_filter = ('status', 'scheduled_time', 'moderation_reason', 'created_at', 'is_promotional')
-    search_fields = ('post_number', 'user__name', 'text_content')
+    # text_content is searched through the full-text index in get_search_results
+    search_fields = ('post_number', 'user__name')
     
     readonly_fields = (
         'post_number', 'submission_ip', 'submission_user_agent', 
         'instagram_media_id', 'created_at', 'posted_at',
-        'moderation_reason', 'llm_moderation_response',
+        'moderation_reason',
         'meta_api_status', 'meta_api_error' 
     )
+
+    def get_queryset(self, request):
+        # Join the user for the list's __str__ and leave the large JSON/audit columns
+        # deferred; the change view loads them lazily when it renders them.
+        return super().get_queryset(request).select_related('user').defer(
+            'meta_api_error', 'submission_user_agent', 'search_vector'
+        )
+
+    def get_search_results(self, request, queryset, search_term):
+        results, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        if search_term:
+            # GIN-indexed tsvector match instead of an ILIKE '%term%' scan over every message
+            query = SearchQuery(search_term, config='english', search_type='websearch')
+            results |= queryset.filter(search_vector=query)
+        return results, may_have_duplicates
     
     fieldsets = (
         ('Create Post', {
@@ -170,12 +222,10 @@ class PostAdmin(admin.ModelAdmin):
                 )
                 messages.info(request, f"New user '{new_name}' created.")
 
-        # 2. Generate post_number
-        if is_new and not obj.post_number:
-            obj.post_number = Post.get_next_post_number()
-            if not obj.submission_ip:
-                obj.submission_ip = "127.0.0.1" 
-                obj.submission_user_agent = "Admin Panel"
+        # 2. Admin submission defaults (post_number is assigned by the DB sequence on INSERT)
+        if is_new and not obj.submission_ip:
+            obj.submission_ip = "127.0.0.1" 
+            obj.submission_user_agent = "Admin Panel"
 
         # 3. Handle Relative Scheduling
         delay_hours = form.cleaned_data.get('schedule_delay_hours')
@@ -189,12 +239,11 @@ class PostAdmin(admin.ModelAdmin):
 
         # 4. Final Save & Queue
         if obj.scheduled_time:
+            # No task is queued here: the dispatch_due_posts beat task picks the post up
+            # once scheduled_time has passed.
             obj.status = Post.PostStatus.SCHEDULED
             super().save_model(request, obj, form, change)
             
-            # Use on_commit to ensure task only fires after DB commit
-            transaction.on_commit(lambda: process_and_publish_post.apply_async(args=[obj.id], eta=obj.scheduled_time))
-            
             local_time_str = obj.scheduled_time.strftime('%Y-%m-%d %H:%M:%S')
             messages.success(request, f"Post #{obj.post_number} scheduled for {local_time_str} (Server Time).")
         
@@ -213,14 +262,4 @@ class PostAdmin(admin.ModelAdmin):
 
     @admin.display(description='Status', ordering='status')
     def get_status_display_colored(self, obj):
-        if obj.status == Post.PostStatus.POSTED:
-            color = "green"
-        elif obj.status == Post.PostStatus.SCHEDULED:
-            color = "purple"
-        elif obj.status in [Post.PostStatus.PENDING_MODERATION, Post.PostStatus.AWAITING_PAYMENT]:
-            color = "orange"
-        elif obj.status == Post.PostStatus.FAILED:
-            color = "red"
-        else:
-            color = "blue"
-        return format_html('<b style="color: {};">{}</b>', color, obj.get_status_display())
\ No newline at end of file
+        return _STATUS_HTML.get(obj.status, '')
\ No newline at end of file
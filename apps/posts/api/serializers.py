@@ -1,8 +1,14 @@
 # apps/posts/api/serializers.py
 
+import re
 from rest_framework import serializers
 from ..models import Post, PostImage
 
+# Raw submissions may carry rich-text tags (<b>, <c:#HEX>, <s:INT>) on top of the 2200
+# visible characters; anything beyond this is rejected before any regex runs on it.
+MAX_RAW_TEXT_LENGTH = 10000
+_TAG_RE = re.compile(r'<[^>]+>')
+
 class PostImageSerializer(serializers.ModelSerializer):
     class Meta:
         model = PostImage
@@ -17,4 +23,15 @@ class PostListSerializer(serializers.ModelSerializer):
         fields = ['post_number', 'user_name', 'text_content', 'status', 'posted_at', 'images']
 
 class PostCreateSerializer(serializers.Serializer):
-    text_content = serializers.CharField(max_length=2200, min_length=1)
\ No newline at end of file
+    text_content = serializers.CharField(max_length=MAX_RAW_TEXT_LENGTH, min_length=1)
+
+    def validate(self, attrs):
+        # Strip tags once here; the clean text is what gets stored and moderated,
+        # so the Instagram caption limit applies to it rather than to the raw input.
+        clean_text_content = _TAG_RE.sub('', attrs['text_content'])
+        if len(clean_text_content) > 2200:
+            raise serializers.ValidationError(
+                {'text_content': "Ensure this field has no more than 2200 characters."}
+            )
+        attrs['clean_text_content'] = clean_text_content
+        return attrs
\ No newline at end of file
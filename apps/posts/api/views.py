@@ -1,20 +1,23 @@
 # apps/posts/api/views.py
 
-import re # --- NEW: Import re for stripping tags ---
+import logging
 from django.db import transaction
+from django.db.models import Prefetch
 from rest_framework import generics, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
 from rest_framework.pagination import PageNumberPagination
 
-from ..models import Post
+from ..models import Post, PostImage, PostModerationLog
 from ..tasks import process_and_publish_post
 from apps.users.services import user_service
 from apps.core.services.settings_service import get_global_settings
 from apps.moderation.services.content_validator import check_for_blocked_words, analyze_with_llm
 from .serializers import PostCreateSerializer, PostListSerializer
 
+logger = logging.getLogger(__name__)
+
 class PostCreateAPIView(APIView):
     permission_classes = [AllowAny]
 
@@ -25,15 +28,16 @@ class PostCreateAPIView(APIView):
 
         # 1. USER VALIDATION
         user, _ = user_service.get_or_create_user(request)
-        if not user or user.is_hard_blocked:
+        # The block flag is re-read from the DB: the cookie lookup may be a cached snapshot
+        if not user or user_service.is_hard_blocked(user):
             return Response({"error": "You are not allowed to post."}, status=status.HTTP_403_FORBIDDEN)
 
         settings = get_global_settings()
         
         # --- NEW: Separate Raw and Clean Text ---
         raw_text_content = serializer.validated_data['text_content']
-        # Strip all <tag> patterns to get clean text for DB and Moderation
-        clean_text_content = re.sub(r'<[^>]+>', '', raw_text_content)
+        # Tag-stripped by the serializer; clean text goes to the DB and Moderation
+        clean_text_content = serializer.validated_data['clean_text_content']
         
         # 2. MODERATION ANALYSIS (Use clean_text_content)
         final_status = Post.PostStatus.PROCESSING
@@ -66,28 +70,36 @@ class PostCreateAPIView(APIView):
                 moderation_reason = "Message marked as promotional. Payment required to proceed."
                 requires_payment = True
 
-        # 3. ATOMIC ACTION (Create Post & Dispatch Task)
+        # 3. CREATE POST & DISPATCH TASK
+        # The post and its moderation log commit together; if either INSERT fails nothing is
+        # saved and no task is queued, so there's never a PROCESSING post nobody will publish.
+        # post_number comes from a DB sequence, so no row lock is needed for the numbering.
         post = None
         try:
             with transaction.atomic():
                 post = Post.objects.create(
                     user=user,
                     text_content=clean_text_content, # --- SAVE CLEAN TEXT TO DB ---
-                    post_number=Post.get_next_post_number(),
                     submission_ip=user_service.get_client_ip(request),
                     submission_user_agent=request.META.get('HTTP_USER_AGENT', '')[:255],
                     status=final_status,
                     is_promotional=is_promotional_post,
-                    llm_moderation_response=raw_llm_response,
                     moderation_reason=moderation_reason
                 )
 
+                if raw_llm_response is not None:
+                    PostModerationLog.objects.create(post=post, raw_data=raw_llm_response)
+
                 if final_status == Post.PostStatus.PROCESSING:
                     # --- PASS RAW CONTENT (with tags) TO TASK ---
-                    process_and_publish_post.delay(post.id, raw_content=raw_text_content)
-
-        except Exception as e:
-            print(f"ERROR during post creation transaction: {e}")
+                    # Dispatch only once the row is committed so the worker can't race the INSERT,
+                    # and a rolled-back request never reaches the broker.
+                    transaction.on_commit(
+                        lambda pid=post.id, raw=raw_text_content: process_and_publish_post.delay(pid, raw_content=raw)
+                    )
+
+        except Exception:
+            logger.exception("Post creation failed")
             return Response({"error": "An internal error occurred while submitting your post."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
         # 4. RETURN RESPONSE
@@ -119,6 +131,11 @@ class RecentPostsListView(generics.ListAPIView):
     permission_classes = [AllowAny]
     serializer_class = PostListSerializer
     pagination_class = StandardResultsSetPagination
+    # Only load the columns PostListSerializer renders; the JSON/audit columns stay in the DB.
     queryset = Post.objects.exclude(
         status__in=[Post.PostStatus.AWAITING_PAYMENT, Post.PostStatus.SCHEDULED]
-    ).select_related('user').order_by('-created_at')
\ No newline at end of file
+    ).select_related('user').only(
+        'post_number', 'text_content', 'status', 'posted_at', 'created_at', 'user__name'
+    ).prefetch_related(
+        Prefetch('images', queryset=PostImage.objects.only('post', 'image_url', 'is_text_image'))
+    ).order_by('-created_at')
\ No newline at end of file
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-16 09:12
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0004_post_meta_api_error_post_meta_api_status'),
+    ]
+
+    operations = [
+        # Continue numbering from the highest existing post (or 2100 on an empty table).
+        migrations.RunSQL(
+            sql=(
+                "CREATE SEQUENCE IF NOT EXISTS post_number_seq OWNED BY posts_post.post_number;"
+                "SELECT setval('post_number_seq', COALESCE((SELECT MAX(post_number) FROM posts_post), 2099) + 1, false);"
+            ),
+            reverse_sql="DROP SEQUENCE IF EXISTS post_number_seq;",
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='post_number',
+            field=models.PositiveIntegerField(db_default=models.Func(models.Value('post_number_seq'), function='nextval', output_field=models.PositiveIntegerField()), db_index=True, help_text='Unique, sequential post number starting from 2100.', unique=True, validators=[django.core.validators.MinValueValidator(2100)]),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.7 on 2026-10-16 09:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def copy_responses_to_logs(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    PostModerationLog = apps.get_model('posts', 'PostModerationLog')
+    rows = Post.objects.filter(llm_moderation_response__isnull=False).values_list('id', 'llm_moderation_response')
+    PostModerationLog.objects.bulk_create(
+        (PostModerationLog(post_id=post_id, raw_data=data) for post_id, data in rows.iterator()),
+        batch_size=500,
+    )
+
+
+def copy_logs_to_responses(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    PostModerationLog = apps.get_model('posts', 'PostModerationLog')
+    for post_id, data in PostModerationLog.objects.values_list('post_id', 'raw_data').iterator():
+        Post.objects.filter(id=post_id).update(llm_moderation_response=data)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0005_post_post_number_sequence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostModerationLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('raw_data', models.JSONField(help_text='The raw JSON response from the LLM moderation analysis.')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='moderation_log', to='posts.post')),
+            ],
+        ),
+        migrations.RunPython(copy_responses_to_logs, copy_logs_to_responses),
+        migrations.RemoveField(
+            model_name='post',
+            name='llm_moderation_response',
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-16 10:05
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0006_postmoderationlog_remove_post_llm_moderation_response'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='post_search_vector_gin'),
+        ),
+        migrations.RunSQL(
+            sql=(
+                "CREATE TRIGGER posts_post_search_vector_update "
+                "BEFORE INSERT OR UPDATE OF text_content ON posts_post "
+                "FOR EACH ROW EXECUTE FUNCTION "
+                "tsvector_update_trigger(search_vector, 'pg_catalog.english', text_content);"
+                "UPDATE posts_post SET search_vector = to_tsvector('pg_catalog.english', text_content);"
+            ),
+            reverse_sql="DROP TRIGGER IF EXISTS posts_post_search_vector_update ON posts_post;",
+        ),
+    ]
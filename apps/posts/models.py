@@ -1,6 +1,8 @@
 # apps/posts/models.py
 
-from django.db import models, transaction
+from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator
 from apps.users.models import User  # Import User model from the users app
 
@@ -17,6 +19,10 @@ class Post(models.Model):
         unique=True,
         db_index=True,
         validators=[MinValueValidator(2100)],
+        # Assigned by Postgres from post_number_seq (see migration 0005) and read back via RETURNING.
+        db_default=models.Func(
+            models.Value('post_number_seq'), function='nextval', output_field=models.PositiveIntegerField()
+        ),
         help_text="Unique, sequential post number starting from 2100."
     )
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='posts')
@@ -43,12 +49,6 @@ class Post(models.Model):
         help_text="Set to True if the LLM analysis identifies the post as promotional."
     )
 
-    llm_moderation_response = models.JSONField(
-        null=True,
-        blank=True,
-        help_text="The raw JSON response from the LLM moderation analysis."
-    )
-
     moderation_reason = models.CharField(
         max_length=255,
         blank=True,
@@ -84,20 +84,18 @@ class Post(models.Model):
         help_text="Timestamp of when the post was successfully uploaded to a social media platform."
     )
 
+    # Kept in sync with text_content by a DB trigger (see migration 0007); used by admin search.
+    search_vector = SearchVectorField(null=True, editable=False)
+
     class Meta:
         ordering = ['-post_number']
+        indexes = [
+            GinIndex(fields=['search_vector'], name='post_search_vector_gin'),
+        ]
 
     def __str__(self):
         return f"Post #{self.post_number} by {self.user.name}"
 
-    @classmethod
-    def get_next_post_number(cls):
-        with transaction.atomic():
-            last_post = cls.objects.select_for_update().order_by('-post_number').first()
-            if last_post:
-                return last_post.post_number + 1
-            return 2100
-
 class PostImage(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='images')
     image_url = models.URLField(max_length=1024, help_text="URL to the image stored in S3.")
@@ -109,4 +107,17 @@ class PostImage(models.Model):
 
     def __str__(self):
         type_of_image = "Text Image" if self.is_text_image else "User Upload"
-        return f"{type_of_image} for Post #{self.post.post_number}"
\ No newline at end of file
+        return f"{type_of_image} for Post #{self.post.post_number}"
+
+
+class PostModerationLog(models.Model):
+    """
+    Raw LLM moderation response for a post. Kept out of Post so feed and admin
+    queries don't drag the (potentially large) JSON along with every row.
+    """
+    post = models.OneToOneField(Post, on_delete=models.CASCADE, related_name='moderation_log')
+    raw_data = models.JSONField(help_text="The raw JSON response from the LLM moderation analysis.")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Moderation log for Post #{self.post.post_number}"
@@ -3,13 +3,86 @@
 import os
 import re
 import io
+import queue
+import threading
+from bisect import bisect_right
+from functools import lru_cache
+from itertools import accumulate
 from PIL import Image, ImageDraw, ImageFont
 from django.conf import settings
 
-try:
-    from fontTools.merge import Merger
-except ImportError:
-    raise ImportError("Error: fontTools is not installed. Please install it using: pip install fonttools")
+# Resolved once per process; the merged font only has to be located (or built) the first time.
+_MERGED_FONT_PATH: str | None = None
+_MERGED_FONT_LOCK = threading.Lock()
+
+# Real emoji blocks only: the SMP pictograph/emoticon/flag range, misc symbols, dingbats,
+# a few BMP pictographs and subdivision-flag tags. Variation selector 16 and keycap marks
+# go with them; a ZWJ is only dropped inside an emoji sequence so Indic conjuncts survive.
+_EMOJI_CHARS = (
+    "\U0001F000-\U0001FAFF\u2600-\u27BF\u231A\u231B\u23E9-\u23F3\u23F8-\u23FA"
+    "\u2B05-\u2B07\u2B1B\u2B1C\u2B50\u2B55\U000E0020-\U000E007F"
+)
+_EMOJI_RE = re.compile(f"(?:[{_EMOJI_CHARS}\uFE0F\u20E3]|\u200D(?=[{_EMOJI_CHARS}]))+")
+_TAG_RE = re.compile(r'<[^>]+>')
+_COLOR_RE = re.compile(r'^#(?:[A-Fa-f0-9]{3}){1,2}$')
+_RICH_TAG_RE = re.compile(r'(<b>|</b>|<c:#[0-9a-fA-F]+>|</c>|<s:\d+>|</s>)')
+_NEWLINE_RE = re.compile(r'(\n)')
+
+@lru_cache(maxsize=64)
+def _load_font(path: str, size: int) -> ImageFont.FreeTypeFont:
+    """Process-wide font cache; generators are built per post, so a per-instance cache never hit."""
+    return ImageFont.truetype(path, size)
+
+# Finished canvases are handed back here and repainted for the next post instead of being
+# reallocated; a handful covers the concurrent generators in one worker process.
+_CANVAS_POOL: "queue.LifoQueue[Image.Image]" = queue.LifoQueue(maxsize=4)
+
+def _acquire_canvas(size: tuple[int, int], color: str) -> Image.Image:
+    try:
+        canvas = _CANVAS_POOL.get_nowait()
+    except queue.Empty:
+        return Image.new('RGBA', size, color=color)
+    if canvas.size != size:
+        return Image.new('RGBA', size, color=color)
+    # Repainting also restores the alpha channel cut by the previous post's corners
+    ImageDraw.Draw(canvas).rectangle((0, 0, size[0], size[1]), fill=color)
+    return canvas
+
+def _release_canvas(canvas: Image.Image):
+    try:
+        _CANVAS_POOL.put_nowait(canvas)
+    except queue.Full:
+        pass
+
+@lru_cache(maxsize=32)
+def _render_header_template(width: int, header_height: int, title: str, font_path: str, colors: tuple[str, str, str]) -> Image.Image:
+    """Header strip with everything but the post id and date, which change on every post."""
+    bg_color, center_text_color, border_color = colors
+    # Covers row header_height too, as an inclusive rectangle([0, 0, W, H]) fill would
+    header = Image.new('RGBA', (width, header_height + 1), color=bg_color)
+    draw = ImageDraw.Draw(header)
+    draw.text((width / 2, header_height // 2), title, font=_load_font(font_path, 42), fill=center_text_color, anchor="mm")
+    draw.line([(0, header_height - 1), (width, header_height - 1)], fill=border_color, width=2)
+    return header
+
+@lru_cache(maxsize=8)
+def _outer_mask(width: int, height: int, radius: int) -> Image.Image:
+    """Rounded-corner alpha mask; depends only on the card geometry, so it is built once."""
+    mask = Image.new('L', (width, height), 0)
+    ImageDraw.Draw(mask).rounded_rectangle((0, 0, width, height), radius=radius, fill=255)
+    return mask
+
+@lru_cache(maxsize=8)
+def _corner_tiles(width: int, height: int, radius: int) -> tuple:
+    """(box, alpha tile) for each rounded corner; the canvas is opaque everywhere else."""
+    if radius <= 0:
+        return ()
+    mask, size = _outer_mask(width, height, radius), radius + 1
+    boxes = (
+        (0, 0, size, size), (width - size, 0, width, size),
+        (0, height - size, size, height), (width - size, height - size, width, height),
+    )
+    return tuple((box, mask.crop(box)) for box in boxes)
 
 class InstagramPostError(Exception): pass
 class FontError(InstagramPostError): pass
@@ -25,17 +98,19 @@ class InstagramPostGenerator:
         self.HEADER_SIDE_TEXT_COLOR, self.HEADER_CENTER_TEXT_COLOR, self.HEADER_BORDER_COLOR = "#A0A0A0", "#3D3D3D", "#333333"
         self.AVATAR_BG_COLOR, self.AVATAR_TEXT_COLOR = "#4169E1", "#FFFFFF"
         self.USERNAME_COLOR, self.BUBBLE_COLOR, self.MESSAGE_TEXT_COLOR = "#A0A0A0", "#3E3E3E", "#FFFFFF"
+        self.BOLD_STROKE_WIDTH = 1
 
         self._validate_and_set_inputs(username, post_id, message, short_date, title)
         self._apply_customizations(kwargs)
         self.font_path = self._get_or_create_merged_font()
-        self.font_cache = {}  # Cache for fonts to avoid reloading
+        self._textlen_cache: dict[tuple[str, int, bool], float] = {}  # Widths measured while wrapping are reused when drawing
 
-        self.image = Image.new('RGB', (self.WIDTH, self.HEIGHT), color=self.BG_COLOR)
-        self.draw = ImageDraw.Draw(self.image)
+        # Pooled canvas, only held while generate_image runs
+        self.image = None
+        self.draw = None
 
     def _validate_color(self, color_string: str, param_name: str):
-        if not isinstance(color_string, str) or not re.match(r'^#(?:[A-Fa-f0-9]{3}){1,2}$', color_string):
+        if not isinstance(color_string, str) or not _COLOR_RE.match(color_string):
             raise InvalidParameterError(f"Parameter '{param_name}' has an invalid hex color format: '{color_string}'")
 
     def _apply_customizations(self, kwargs: dict):
@@ -65,14 +140,26 @@ class InstagramPostGenerator:
 
     def _strip_tags(self, text: str) -> str:
         """Removes <...> tags to get the pure display text."""
-        return re.sub(r'<[^>]+>', '', text)
+        return _TAG_RE.sub('', text)
 
     def _get_or_create_merged_font(self) -> str:
+        global _MERGED_FONT_PATH
+        if _MERGED_FONT_PATH is not None: return _MERGED_FONT_PATH
+        with _MERGED_FONT_LOCK:
+            if _MERGED_FONT_PATH is None:
+                _MERGED_FONT_PATH = self._resolve_merged_font()
+        return _MERGED_FONT_PATH
+
+    def _resolve_merged_font(self) -> str:
         font_dir = os.path.join(settings.BASE_DIR, "assets", "fonts")
         merged_font_path = os.path.join(font_dir, "merged_font.ttf")
         if os.path.exists(merged_font_path): return merged_font_path
         
         print("Merged font not found. Creating one...")
+        try:
+            from fontTools.merge import Merger
+        except ImportError:
+            raise ImportError("Error: fontTools is not installed. Please install it using: pip install fonttools")
         # Ensure these files exist in your assets/fonts directory
         font_paths = [os.path.join(font_dir, f) for f in ["NotoSans-Regular.ttf", "NotoSansGurmukhi-Regular.ttf", "NotoSansDevanagari-Regular.ttf"]]
         try:
@@ -89,9 +176,8 @@ class InstagramPostGenerator:
         """
         Removes emojis from the text but preserves whitespace and newlines.
         """
-        emoji_pattern = re.compile("[\U0001F600-\U0001F64F\U0001F300-\U0001F5FF\U0001F680-\U0001F6FF\U0001F700-\U0001FAFF\U00002702-\U000027B0\U000024C2-\U0001F251]+", flags=re.UNICODE)
         # FIX: Just use sub(), do not use split() which eats newlines
-        return emoji_pattern.sub(r'', text)
+        return _EMOJI_RE.sub(r'', text)
 
     def _get_dynamic_font_size(self) -> int:
         # Calculate font size based on the CLEAN message length, ignoring tags
@@ -104,75 +190,88 @@ class InstagramPostGenerator:
 
     def _get_font(self, size: int):
         """Helper to get cached font instance."""
-        if size not in self.font_cache:
-            self.font_cache[size] = ImageFont.truetype(self.font_path, size)
-        return self.font_cache[size]
+        return _load_font(self.font_path, size)
+
+    def _textlen(self, text: str, size: int, bold: bool = False) -> float:
+        """
+        Memoized draw.textlength for a run of text at a given font size.
+        Bold runs are drawn with a 1px stroke, which widens the run by one pixel on each side.
+        """
+        key = (text, size, bold)
+        width = self._textlen_cache.get(key)
+        if width is None:
+            width = self.draw.textlength(text, font=self._get_font(size))
+            if bold:
+                width += 2 * self.BOLD_STROKE_WIDTH
+            self._textlen_cache[key] = width
+        return width
 
     # --- Rich Text Parsing & Wrapping ---
 
     def _parse_rich_text(self, text, default_size, default_color):
-        """Parses text with tags <b>, <c:#HEX>, <s:INT> into segments."""
-        tag_pattern = re.compile(r'(<b>|</b>|<c:#[0-9a-fA-F]+>|</c>|<s:\d+>|</s>)')
-        parts = tag_pattern.split(text)
+        """
+        Parses text with tags <b>, <c:#HEX>, <s:INT> into segments.
+        Returns (segments, styles): segments are (text, style_idx) tuples indexing into
+        styles, a table of distinct (color, size, bold) tuples.
+        """
+        if '<' not in text:
+            # Plain caption (the common case): a single run in the default style, no tag split
+            return [(text, 0)], [(default_color, default_size, False)]
+
+        parts = _RICH_TAG_RE.split(text)
         
         segments = []
-        style_stack = [{'bold': False, 'color': default_color, 'size': default_size}]
+        styles = []
+        style_index = {}
+        style_stack = [(default_color, default_size, False)]
         
         for part in parts:
             if not part: continue
             
+            color, size, bold = style_stack[-1]
             lower_part = part.lower()
             if lower_part == '<b>':
-                new_style = style_stack[-1].copy()
-                new_style['bold'] = True
-                style_stack.append(new_style)
+                style_stack.append((color, size, True))
             elif lower_part == '</b>':
                 if len(style_stack) > 1: style_stack.pop()
             elif lower_part.startswith('<c:'):
-                color = part[3:-1] 
-                if self._validate_color_format(color):
-                    new_style = style_stack[-1].copy()
-                    new_style['color'] = color
-                    style_stack.append(new_style)
+                new_color = part[3:-1] 
+                if self._validate_color_format(new_color):
+                    style_stack.append((new_color, size, bold))
             elif lower_part == '</c>':
                  if len(style_stack) > 1: style_stack.pop()
             elif lower_part.startswith('<s:'):
                 try:
-                    size = int(part[3:-1])
-                    new_style = style_stack[-1].copy()
-                    new_style['size'] = size
-                    style_stack.append(new_style)
+                    style_stack.append((color, int(part[3:-1]), bold))
                 except: pass
             elif lower_part == '</s>':
                  if len(style_stack) > 1: style_stack.pop()
             else:
                 style = style_stack[-1]
-                segments.append({
-                    'text': part,
-                    'color': style['color'],
-                    'size': style['size'],
-                    'bold': style['bold']
-                })
-        return segments
+                idx = style_index.get(style)
+                if idx is None:
+                    idx = style_index[style] = len(styles)
+                    styles.append(style)
+                segments.append((part, idx))
+        return segments, styles
 
     def _validate_color_format(self, color):
-         return isinstance(color, str) and re.match(r'^#(?:[A-Fa-f0-9]{3}){1,2}$', color)
+         return isinstance(color, str) and _COLOR_RE.match(color)
 
-    def _wrap_rich_text(self, segments, max_width):
+    def _wrap_rich_text(self, segments, styles, max_width):
         """
-        Wraps parsed segments into lines based on width.
+        Wraps parsed segments into lines of (text, style_idx) tuples based on width.
         Crucially handles explicit newlines ('\n') in text by forcing a line break.
         """
         lines = []
         current_line = []
         current_width = 0
         
-        for seg in segments:
-            font = self._get_font(seg['size'])
-            
+        for seg_text, idx in segments:
+            _, size, bold = styles[idx]
             # 1. Split by explicit newlines first
             # "Hello\nWorld" -> ["Hello", "\n", "World"]
-            parts = re.split(r'(\n)', seg['text'])
+            parts = _NEWLINE_RE.split(seg_text)
             
             for part in parts:
                 if part == '\n':
@@ -195,19 +294,25 @@ class InstagramPostGenerator:
                     
                     if not word_text: continue
 
-                    word_w = self.draw.textlength(word_text, font=font)
-                    if seg['bold']:
-                        word_w += len(word_text) * 0.5 # Bold buffer
+                    word_w = self._textlen(word_text, size, bold)
                     
-                    if current_width + word_w <= max_width:
-                        current_line.append({**seg, 'text': word_text})
+                    if word_w > max_width:
+                        # Word longer than a whole line (URLs etc.): character-wrap it
+                        if current_line:
+                            lines.append(current_line)
+                        chunks = self._break_long_word(word_text, size, bold, max_width)
+                        lines.extend([(chunk, idx)] for chunk in chunks[:-1])
+                        current_line = [(chunks[-1], idx)]
+                        current_width = self._textlen(chunks[-1], size, bold)
+                    elif current_width + word_w <= max_width:
+                        current_line.append((word_text, idx))
                         current_width += word_w
                     else:
                         # Flush current line
                         if current_line:
                             lines.append(current_line)
                         # Start new line with current word
-                        current_line = [{**seg, 'text': word_text}]
+                        current_line = [(word_text, idx)]
                         current_width = word_w
                     
         if current_line:
@@ -215,20 +320,43 @@ class InstagramPostGenerator:
             
         return lines
 
+    def _break_long_word(self, word, size, bold, max_width):
+        """
+        Splits a word wider than max_width into chunks that each fit on one line.
+        Each character is measured once and the running widths are bisected for the break
+        points, instead of re-measuring every growing prefix. At least one character goes
+        in each chunk, so a glyph wider than the line cannot loop forever.
+        """
+        font = self._get_font(size)
+        limit = max_width - (2 * self.BOLD_STROKE_WIDTH if bold else 0)
+        prefix_widths = list(accumulate(font.getlength(char) for char in word))
+        chunks = []
+        start, offset = 0, 0.0
+        while start < len(word):
+            end = max(start + 1, bisect_right(prefix_widths, offset + limit))
+            if end >= len(word):
+                break
+            chunks.append(word[start:end])
+            start, offset = end, prefix_widths[end - 1]
+        chunks.append(word[start:])
+        return chunks
+
     def _draw_header(self):
-        self.draw.rectangle([0, 0, self.WIDTH, self.HEADER_HEIGHT], fill=self.HEADER_BG_COLOR)
         y_center, padding_x = self.HEADER_HEIGHT // 2, 50
-        font_side, font_center = ImageFont.truetype(self.font_path, 36), ImageFont.truetype(self.font_path, 42)
+        header = _render_header_template(
+            self.WIDTH, self.HEADER_HEIGHT, self.title, self.font_path,
+            (self.HEADER_BG_COLOR, self.HEADER_CENTER_TEXT_COLOR, self.HEADER_BORDER_COLOR)
+        )
+        self.image.paste(header, (0, 0))
+        font_side = self._get_font(36)
         self.draw.text((padding_x, y_center), self.post_id, font=font_side, fill=self.HEADER_SIDE_TEXT_COLOR, anchor="lm")
-        self.draw.text((self.WIDTH / 2, y_center), self.title, font=font_center, fill=self.HEADER_CENTER_TEXT_COLOR, anchor="mm")
         self.draw.text((self.WIDTH - padding_x, y_center), self.short_date, font=font_side, fill=self.HEADER_SIDE_TEXT_COLOR, anchor="rm")
-        self.draw.line([(0, self.HEADER_HEIGHT - 1), (self.WIDTH, self.HEADER_HEIGHT - 1)], fill=self.HEADER_BORDER_COLOR, width=2)
 
     def _draw_body(self):
         px, av_s, sp_x = 50, 90, 20
         sp_y, bub_p, bub_r = 15, 35, 45
-        av_f = ImageFont.truetype(self.font_path, 50)
-        u_f = ImageFont.truetype(self.font_path, 36)
+        av_f = self._get_font(50)
+        u_f = self._get_font(36)
         
         default_font_size = self._get_dynamic_font_size()
         
@@ -236,8 +364,8 @@ class InstagramPostGenerator:
         max_tw = self.WIDTH - px - bub_x - (bub_p * 2)
         
         # 1. Parse and Wrap Rich Text
-        segments = self._parse_rich_text(self.message, default_font_size, self.MESSAGE_TEXT_COLOR)
-        wrapped_lines = self._wrap_rich_text(segments, max_tw)
+        segments, styles = self._parse_rich_text(self.message, default_font_size, self.MESSAGE_TEXT_COLOR)
+        wrapped_lines = self._wrap_rich_text(segments, styles, max_tw)
         
         # 2. Calculate total height
         line_spacing = 15
@@ -254,8 +382,8 @@ class InstagramPostGenerator:
                 total_text_height += h
             else:
                 max_h = 0
-                for seg in line:
-                    font = self._get_font(seg['size'])
+                for _, idx in line:
+                    font = self._get_font(styles[idx][1])
                     ascent, descent = font.getmetrics()
                     max_h = max(max_h, ascent + descent)
                 line_heights.append(max_h)
@@ -290,42 +418,57 @@ class InstagramPostGenerator:
             line_h = line_heights[i]
             current_x = bub_x + bub_p
             
-            for seg in line:
-                font = self._get_font(seg['size'])
-                stroke_w = 1 if seg['bold'] else 0
+            for seg_text, idx in line:
+                color, size, bold = styles[idx]
+                stroke_w = self.BOLD_STROKE_WIDTH if bold else 0
                 
                 self.draw.text(
                     (current_x, current_y), 
-                    seg['text'], 
-                    font=font, 
-                    fill=seg['color'], 
+                    seg_text, 
+                    font=self._get_font(size), 
+                    fill=color, 
                     stroke_width=stroke_w,
-                    stroke_fill=seg['color']
+                    stroke_fill=color
                 )
-                seg_w = self.draw.textlength(seg['text'], font=font)
-                current_x += seg_w
+                current_x += self._textlen(seg_text, size)
             
             current_y += line_h + line_spacing
 
     def _apply_rounded_border_and_corners(self, content_image: Image.Image) -> Image.Image:
-        final_image = Image.new('RGBA', (self.WIDTH, self.HEIGHT), self.border_color)
-        mask = Image.new('L', (self.WIDTH, self.HEIGHT), 0)
-        inset, inner_radius = self.border_width, max(0, self.border_radius - self.border_width)
-        ImageDraw.Draw(mask).rounded_rectangle((inset, inset, self.WIDTH - inset, self.HEIGHT - inset), radius=inner_radius, fill=255)
-        final_image.paste(content_image, (0, 0), mask)
-        outer_mask = Image.new('L', (self.WIDTH, self.HEIGHT), 0)
-        ImageDraw.Draw(outer_mask).rounded_rectangle((0, 0, self.WIDTH, self.HEIGHT), radius=self.border_radius, fill=255)
-        final_image.putalpha(outer_mask)
+        # The border is a ring drawn straight onto the RGBA content, rather than a border-coloured
+        # canvas plus an inner mask and a full-frame paste; only the outer mask is allocated.
+        final_image = content_image
+        if self.border_width:
+            ImageDraw.Draw(final_image).rounded_rectangle(
+                (0, 0, self.WIDTH, self.HEIGHT), radius=self.border_radius,
+                outline=self.border_color, width=self.border_width
+            )
+        # Only the corners need transparency, so cut those small tiles instead of rewriting
+        # the alpha of the whole frame with putalpha.
+        for box, tile in _corner_tiles(self.WIDTH, self.HEIGHT, self.border_radius):
+            corner = final_image.crop(box)
+            corner.putalpha(tile)
+            final_image.paste(corner, box[:2])
         return final_image
 
     def generate_image(self):
-        self._draw_header()
-        self._draw_body()
-        final_image = self._apply_rounded_border_and_corners(self.image)
-        buffer = io.BytesIO()
-        final_image.save(buffer, format='PNG')
-        buffer.seek(0)
-        return buffer
+        # Each call takes its own canvas and hands it back to the pool as soon as it is encoded.
+        # RGBA from the start so the finished card only needs its corners cut, not a conversion pass
+        self.image = _acquire_canvas((self.WIDTH, self.HEIGHT), self.BG_COLOR)
+        self.draw = ImageDraw.Draw(self.image)
+        try:
+            self._draw_header()
+            self._draw_body()
+            final_image = self._apply_rounded_border_and_corners(self.image)
+            buffer = io.BytesIO()
+            # Uploaded once and discarded: fast zlib level instead of the default 6
+            final_image.save(buffer, format='PNG', compress_level=1)
+            buffer.seek(0)
+            return buffer
+        finally:
+            canvas, self.image, self.draw = self.image, None, None
+            if canvas is not None:
+                _release_canvas(canvas)
 
 def create_post_image(post_number, username, message, short_date, title, **kwargs):
     try:
@@ -1,12 +1,60 @@
 # apps/posts/services/instagram_uploader.py
 
+import logging
 import requests
 import time
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from django.conf import settings
+from django.core.cache import cache
 from apps.core.models import GlobalSettings
 
+logger = logging.getLogger(__name__)
+
+# One keep-alive session per worker process so consecutive Graph API calls reuse the TLS connection
+# (shared with the reposter; the pool is sized for a gevent worker's concurrent tasks).
+# Transient throttling/5xx responses to GETs (status polling) are retried on the pooled
+# connection with backoff (0.5s, 1s, 2s, capped at 8s). POSTs are only retried when the
+# connection itself failed, i.e. the request never reached Graph: re-sending a media_publish
+# after a read timeout or 5xx could publish the post twice. Retry-After is ignored so a
+# worker never sleeps for an arbitrary server-chosen time inside one request; sustained
+# throttling falls through to the task's own backoff.
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=50, max_retries=Retry(
+    total=3,
+    backoff_factor=0.5,
+    backoff_max=8,
+    status_forcelist=[429, 500, 502, 503, 504],
+    allowed_methods=['GET'],
+    respect_retry_after_header=False,
+    raise_on_status=False,
+)))
+REQUEST_TIMEOUT = 10
+
+def graph_session():
+    """
+    The shared keep-alive Graph API session, for other apps that call Graph directly.
+    Its HTTP-level retries only re-send GETs, so POSTs such as media_publish are never duplicated.
+    """
+    return _SESSION
+
+# Settings are fixed for the life of the process, so the Graph endpoints are built once
+GRAPH_API_BASE = f"https://graph.facebook.com/{settings.GRAPH_API_VERSION}"
+MEDIA_URL = f"{GRAPH_API_BASE}/{settings.INSTAGRAM_BUSINESS_ACCOUNT_ID}/media"
+MEDIA_PUBLISH_URL = f"{GRAPH_API_BASE}/{settings.INSTAGRAM_BUSINESS_ACCOUNT_ID}/media_publish"
+
+ACCESS_TOKEN_CACHE_KEY = 'ig_access_token'
+ACCESS_TOKEN_CACHE_TIMEOUT = 300
+
 def get_access_token():
-    """Retrieves access token from DB, falls back to settings."""
+    """
+    Retrieves access token from DB, falls back to settings.
+    Cached for a few minutes so publishing doesn't query GlobalSettings for every post;
+    GlobalSettings.save() clears the entry.
+    """
+    return cache.get_or_set(ACCESS_TOKEN_CACHE_KEY, _load_access_token, ACCESS_TOKEN_CACHE_TIMEOUT)
+
+def _load_access_token():
     try:
         gs = GlobalSettings.objects.get()
         if gs.instagram_access_token:
@@ -15,22 +63,36 @@ def get_access_token():
         pass
     return settings.ACCESS_TOKEN
 
-def wait_for_media_processing(container_id, access_token, timeout=60, interval=5):
+def _response_json(response):
+    """
+    Parses a Graph response body without raising. Used once media_publish has been sent:
+    a decode error there is a RequestException, and letting it reach the task's autoretry
+    would publish the post a second time.
+    """
+    try:
+        return response.json()
+    except ValueError:
+        return {'message': 'Non-JSON response from Graph API', 'response_text': response.text[:500]}
+
+def wait_for_media_processing(container_id, access_token, timeout=60, interval=0.5, max_interval=10):
     """
     Polls the container status until it is FINISHED or times out.
+    The wait between polls starts at `interval` and doubles up to `max_interval`, so quick
+    containers are published within a second and slow ones don't cost a request every few seconds.
     Returns (True, None) if ready, or (False, error_dict) if failed/timed out.
     """
-    start_time = time.time()
-    url = f"https://graph.facebook.com/{settings.GRAPH_API_VERSION}/{container_id}"
+    deadline = time.monotonic() + timeout
+    url = f"{GRAPH_API_BASE}/{container_id}"
     params = {
         'access_token': access_token,
         'fields': 'status_code,status'
     }
+    status_code = None
 
-    print(f"Polling status for container {container_id}...")
+    logger.info("Polling status for container %s...", container_id)
 
-    while time.time() - start_time < timeout:
-        response = requests.get(url, params=params)
+    while time.monotonic() < deadline:
+        response = _SESSION.get(url, params=params, timeout=REQUEST_TIMEOUT)
         
         if response.status_code != 200:
             return False, response.json()
@@ -39,7 +101,7 @@ def wait_for_media_processing(container_id, access_token, timeout=60, interval=5
         status_code = data.get('status_code')
 
         if status_code == 'FINISHED':
-            print("Container processing FINISHED. Ready to publish.")
+            logger.info("Container processing FINISHED. Ready to publish.")
             return True, None
         
         elif status_code == 'ERROR':
@@ -48,33 +110,36 @@ def wait_for_media_processing(container_id, access_token, timeout=60, interval=5
         elif status_code == 'EXPIRED':
             return False, {'message': 'Container ID expired', 'details': data}
 
-        # If IN_PROGRESS or other status, wait and retry
-        print(f"Status is {status_code}. Waiting {interval}s...")
-        time.sleep(interval)
+        # If IN_PROGRESS or other status, back off and retry
+        wait = min(interval, max(0, deadline - time.monotonic()))
+        logger.info("Status is %s. Waiting %.1fs...", status_code, wait)
+        time.sleep(wait)
+        interval = min(interval * 2, max_interval)
 
     return False, {'message': 'Timed out waiting for media processing', 'last_status': status_code}
 
-def publish_to_instagram(image_url, caption):
+def publish_to_instagram(image_url, caption, access_token=None, processing_timeout=60):
     """
     Publishes an image to Instagram with status polling.
+    `access_token` defaults to get_access_token(); `processing_timeout` bounds the container poll.
     Returns: {'success': bool, 'media_id': str|None, 'error': dict|None, 'status_code': int}
     """
-    access_token = get_access_token()
+    access_token = access_token or get_access_token()
     
     # ---------------------------------------------------------
     # Step 1: Create media container
     # ---------------------------------------------------------
-    container_url = f"https://graph.facebook.com/{settings.GRAPH_API_VERSION}/{settings.INSTAGRAM_BUSINESS_ACCOUNT_ID}/media"
+    container_url = MEDIA_URL
     container_payload = {
         'image_url': image_url, 
         'caption': caption, 
         'access_token': access_token
     }
     
-    response = requests.post(container_url, data=container_payload)
+    response = _SESSION.post(container_url, data=container_payload, timeout=REQUEST_TIMEOUT)
     
     if response.status_code != 200:
-        print(f"Error creating media container: {response.json()}")
+        logger.warning("Error creating media container: %s", response.text)
         return {
             'success': False, 
             'media_id': None, 
@@ -94,10 +159,10 @@ def publish_to_instagram(image_url, caption):
     # ---------------------------------------------------------
     # Step 2: Poll status until FINISHED (Fix for Error 2207027)
     # ---------------------------------------------------------
-    is_ready, processing_error = wait_for_media_processing(container_id, access_token)
+    is_ready, processing_error = wait_for_media_processing(container_id, access_token, timeout=processing_timeout)
     
     if not is_ready:
-        print(f"Media processing failed: {processing_error}")
+        logger.warning("Media processing failed: %s", processing_error)
         return {
             'success': False,
             'media_id': None,
@@ -108,29 +173,50 @@ def publish_to_instagram(image_url, caption):
     # ---------------------------------------------------------
     # Step 3: Publish the container
     # ---------------------------------------------------------
-    publish_url = f"https://graph.facebook.com/{settings.GRAPH_API_VERSION}/{settings.INSTAGRAM_BUSINESS_ACCOUNT_ID}/media_publish"
+    publish_url = MEDIA_PUBLISH_URL
     publish_payload = {
         'creation_id': container_id, 
         'access_token': access_token
     }
     
-    publish_response = requests.post(publish_url, data=publish_payload)
+    # Network errors before this point propagate so the task can retry from a fresh container.
+    # Here the post may already be live even though we never saw the response, so a retry
+    # could publish it twice: report it as a failure for a human to check instead.
+    try:
+        publish_response = _SESSION.post(publish_url, data=publish_payload, timeout=REQUEST_TIMEOUT)
+    except requests.RequestException as e:
+        logger.warning("Publish request for container %s failed: %s", container_id, e)
+        return {
+            'success': False,
+            'media_id': None,
+            'error': {'message': 'Publish request failed; check Instagram before retrying', 'details': str(e)},
+            'status_code': None
+        }
     
     if publish_response.status_code != 200:
-        print(f"Error publishing media: {publish_response.json()}")
+        logger.warning("Error publishing media: %s", publish_response.text)
         return {
             'success': False, 
             'media_id': None, 
-            'error': publish_response.json(),
+            'error': _response_json(publish_response),
             'status_code': publish_response.status_code
         }
     
-    media_id = publish_response.json().get('id')
-    print(f"Successfully published post with media ID: {media_id}")
+    publish_data = _response_json(publish_response)
+    media_id = publish_data.get('id')
+    if not media_id:
+        logger.warning("Publish response for container %s had no media ID: %s", container_id, publish_data)
+        return {
+            'success': False,
+            'media_id': None,
+            'error': {'message': 'No media ID returned; check Instagram before retrying', 'response': publish_data},
+            'status_code': publish_response.status_code
+        }
+    logger.info("Successfully published post with media ID: %s", media_id)
     
     return {
         'success': True, 
         'media_id': media_id, 
         'error': None,
         'status_code': 200
-    }
\ No newline at end of file
+    }
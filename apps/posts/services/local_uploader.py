@@ -3,7 +3,7 @@ import os
 import uuid
 from django.conf import settings
 from django.core.files.storage import default_storage
-from django.core.files.base import ContentFile
+from django.core.files import File
 
 def upload_file_locally(file_obj, file_type='jpeg'):
     if file_type not in ['jpeg', 'png', 'jpg']:
@@ -13,8 +13,8 @@ def upload_file_locally(file_obj, file_type='jpeg'):
     filename = f"{uuid.uuid4()}.{file_type}"
     relative_path = os.path.join('posts', filename)
     
-    # Save the file to MEDIA_ROOT/posts/
-    path = default_storage.save(relative_path, ContentFile(file_obj.read()))
+    # Save the file to MEDIA_ROOT/posts/ (streamed in chunks rather than read into a second copy)
+    path = default_storage.save(relative_path, File(file_obj))
     
     # Return the full public URL that Instagram can reach
     return f"https://loudsurrey.online{settings.MEDIA_URL}{path}"
\ No newline at end of file
@@ -0,0 +1,60 @@
+# apps/posts/services/rate_limiter.py
+
+import logging
+import time
+from django.conf import settings
+from apps.core.services.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Refill and take a token in one atomic step, so concurrent workers can never overspend the bucket.
+# Returns {allowed, seconds_until_next_token}; the wait is a string because Lua numbers
+# are truncated to integers on the way back to the client.
+_TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 60)
+return {allowed, tostring(wait)}
+"""
+
+class TokenBucket:
+    """Redis-backed token bucket holding `capacity` tokens that refill evenly over `period` seconds."""
+
+    def __init__(self, name, capacity, period):
+        self.key = f"ratelimit:{name}"
+        self.capacity = capacity
+        self.rate = capacity / period
+        self._script = None
+
+    def acquire(self):
+        """
+        Takes one token. Returns (True, 0) if allowed, or (False, seconds_to_wait).
+        Fails open if Redis is unreachable, since Graph will still reject calls over its own limit.
+        """
+        try:
+            if self._script is None:
+                self._script = get_redis().register_script(_TOKEN_BUCKET_LUA)
+            allowed, wait = self._script(keys=[self.key], args=[self.capacity, self.rate, time.time()])
+        except Exception as e:
+            logger.warning("Rate limiter unavailable, allowing call: %s", e)
+            return True, 0
+        return bool(allowed), float(wait)
+
+# Instagram caps API-published posts per account over a rolling 24 hours.
+instagram_publish_bucket = TokenBucket(
+    'instagram_publish', capacity=settings.INSTAGRAM_PUBLISH_LIMIT, period=24 * 60 * 60
+)
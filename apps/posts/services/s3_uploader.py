@@ -2,30 +2,50 @@
 
 import boto3
 import uuid
+from functools import lru_cache
 from django.conf import settings
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from botocore.exceptions import NoCredentialsError
 
+# Post images are normally a single PUT; anything past 5 MB goes up as parallel multipart chunks.
+_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=5 * 1024 * 1024,
+    multipart_chunksize=5 * 1024 * 1024,
+    max_concurrency=8,
+    use_threads=True,
+)
+
+@lru_cache(maxsize=None)
+def _get_s3_client():
+    """
+    Builds the S3 client once per worker process; construction loads the service model and
+    credentials. boto3 clients are thread-safe, so every upload shares this one.
+    """
+    return boto3.client(
+        's3',
+        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+        region_name=settings.AWS_S3_REGION_NAME,
+        config=Config(max_pool_connections=50, retries={'mode': 'adaptive', 'max_attempts': 3})
+    )
+
 def upload_file_to_s3(file_obj, file_type='jpeg'):
     if file_type not in ['jpeg', 'png']:
         raise ValueError("Invalid file type. Must be 'jpeg' or 'png'.")
 
     object_name = f"posts/{uuid.uuid4()}.{file_type}"
 
-    s3_client = boto3.client(
-        's3',
-        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-        region_name=settings.AWS_S3_REGION_NAME
-    )
+    s3_client = _get_s3_client()
     
     try:
-        # Use put_object which is simpler and doesn't add a default ACL
-        s3_client.put_object(
-            Body=file_obj,
-            Bucket=settings.AWS_STORAGE_BUCKET_NAME,
-            Key=object_name,
-            ContentType=f'image/{file_type}'
+        s3_client.upload_fileobj(
+            file_obj,
+            settings.AWS_STORAGE_BUCKET_NAME,
+            object_name,
+            ExtraArgs={'ContentType': f'image/{file_type}'},
             # By not specifying 'ACL', no ACL is sent. This is what you want.
+            Config=_TRANSFER_CONFIG
         )
         return f"https://{settings.AWS_S3_CUSTOM_DOMAIN}/{object_name}"
     except NoCredentialsError:
@@ -1,29 +1,67 @@
 # apps/posts/tasks.py
 
-import re 
-from celery import shared_task
+import logging
+import re
+import requests
+from celery import shared_task, Task
 from django.utils import timezone
 from django.db import transaction
+from django.db.models import Prefetch
 from .models import Post, PostImage
 from .services.image_generator import create_post_image
 from .services import local_uploader, instagram_uploader
+from .services.rate_limiter import instagram_publish_bucket
 
-@shared_task
-def process_and_publish_post(post_id, raw_content=None):
+logger = logging.getLogger(__name__)
+
+# Longest single wait for a publish token. Kept well under the Redis broker's visibility
+# timeout so a deferred task is never redelivered as a duplicate; it just re-checks.
+MAX_RATE_LIMIT_COUNTDOWN = 600
+
+# @mentions are stripped from captions so the account doesn't tag people on users' behalf
+_MENTION_RE = re.compile(r'(?<!\S)@\w+')
+
+_CAPTION_TAIL = (
+    "Shared anonymously on LoudSurrey.\n"
+    "⚠️ Disclaimer: We did not create this content and are not responsible for any resulting harm."
+    "\n\n #surreybc #newtonsurrey #surreycentral #strawberryhill #punjabiincanada #surreypind #internationalstudents #kpu #gediroute #surreylife #surreywale"
+)
+
+class PublishPostTask(Task):
+    """Marks the post FAILED once the task gives up (automatic retries exhausted)."""
+
+    def on_failure(self, exc, task_id, args, kwargs, einfo):
+        post_id = args[0] if args else kwargs.get('post_id')
+        if post_id is not None:
+            _fail_post(post_id, str(exc))
+
+# Rendering half of the pipeline: Pillow work is CPU-bound, so this runs on a prefork worker
+# and hands the finished image to publish_post_image on the gevent Graph worker.
+@shared_task(bind=True, base=PublishPostTask, acks_late=True)
+def process_and_publish_post(self, post_id, raw_content=None):
     try:
         # --- 1. INITIAL CHECK & LOCK ---
         # We lock the row to prevent race conditions where two tasks run simultaneously.
         with transaction.atomic():
             try:
-                # select_for_update() ensures no one else can modify this post until we release the lock
-                post = Post.objects.select_for_update().get(id=post_id)
+                # select_for_update() ensures no one else can modify this post until we release the lock.
+                # The user and any already-generated text image come back with it, so the rest of the
+                # task needs no further lookups (only the post row is locked, not the user).
+                post = (
+                    Post.objects.select_for_update(of=('self',))
+                    .select_related('user')
+                    .prefetch_related(Prefetch(
+                        'images', queryset=PostImage.objects.filter(is_text_image=True), to_attr='text_images'
+                    ))
+                    .get(id=post_id)
+                )
             except Post.DoesNotExist:
-                print(f"Post {post_id} not found.")
+                logger.warning("Post %s not found.", post_id)
                 return
 
             # A. IDEMPOTENCY CHECK: If already posted or has media ID, stop.
             if post.status == Post.PostStatus.POSTED or post.instagram_media_id:
-                print(f"Post #{post.post_number} is already published. Aborting duplicate task.")
+                logger.info("Post #%s is already published. Aborting duplicate task.", post.post_number)
                 return
 
             # B. SCHEDULING CHECK
@@ -35,7 +73,7 @@ def process_and_publish_post(post_id, raw_content=None):
                 # Check if it's too early (allow 30s buffer)
                 time_diff = post.scheduled_time - timezone.now()
                 if time_diff.total_seconds() > 30:
-                    print(f"Skipping Post #{post.post_number}: Scheduled for {post.scheduled_time}, but task ran too early.")
+                    logger.info("Skipping Post #%s: Scheduled for %s, but task ran too early.", post.post_number, post.scheduled_time)
                     return
 
             # C. UPDATE STATUS
@@ -43,27 +81,24 @@ def process_and_publish_post(post_id, raw_content=None):
             # This update happens inside the lock, so it's safe.
             if post.status != Post.PostStatus.PROCESSING:
                 post.status = Post.PostStatus.PROCESSING
-                post.save()
+                post.save(update_fields=['status'])
     
-    except Exception as e:
-        print(f"Error during initialization of task for post {post_id}: {e}")
+    except Exception:
+        logger.exception("Error during initialization of task for post %s", post_id)
         return
 
     # --- 2. IMAGE GENERATION & UPLOAD (Outside Atomic Block) ---
-    # We perform slow network/CPU operations outside the DB lock to prevent database bottlenecks.
+    # We perform slow CPU operations outside the DB lock to prevent database bottlenecks.
     try:
-        # We use the data from the 'post' object we fetched earlier.
-        # NOTE: We use post_id for DB lookups to ensure we are using the correct reference.
-
         # --- CHECK FOR EXISTING IMAGE (Smart Retry) ---
-        existing_image = PostImage.objects.filter(post_id=post_id, is_text_image=True).first()
+        existing_image = post.text_images[0] if post.text_images else None
         image_url = None
 
         if existing_image:
-            print(f"Found existing image for Post #{post.post_number}. Skipping generation.")
+            logger.info("Found existing image for Post #%s. Skipping generation.", post.post_number)
             image_url = existing_image.image_url
         else:
-            print(f"Generating image for Post #{post.post_number}...")
+            logger.info("Generating image for Post #%s...", post.post_number)
             message_for_image = raw_content if raw_content else post.text_content
 
             image_file = create_post_image(
@@ -78,7 +113,7 @@ def process_and_publish_post(post_id, raw_content=None):
                 _fail_post(post_id, "Image generation failed")
                 return
 
-            print(f"Uploading image locally for Post #{post.post_number}...")
+            logger.info("Uploading image locally for Post #%s...", post.post_number)
             image_url = local_uploader.upload_file_locally(image_file, file_type='png')
             
             if not image_url:
@@ -87,59 +122,123 @@ def process_and_publish_post(post_id, raw_content=None):
 
             PostImage.objects.create(post_id=post_id, image_url=image_url, is_text_image=True)
 
+    except Exception as e:
+        logger.exception("Error generating image for post %s", post_id)
+        _fail_post(post_id, str(e))
+        return
+
+    # --- 3. HAND OFF TO THE GRAPH WORKER ---
+    publish_post_image.delay(post_id, image_url)
+
+# Graph API half of the pipeline, almost entirely network waits (runs on the gevent worker).
+# Network errors from Graph (after the session's own HTTP-level retries) are retried by Celery
+# with jittered exponential backoff instead of failing the post on the first blip.
+@shared_task(
+    bind=True,
+    base=PublishPostTask,
+    acks_late=True,
+    autoretry_for=(requests.RequestException,),
+    retry_backoff=2,
+    retry_backoff_max=600,
+    retry_jitter=True,
+    max_retries=5,
+)
+def publish_post_image(self, post_id, image_url):
+    post = Post.objects.select_related('user').filter(id=post_id).first()
+    if post is None:
+        logger.warning("Post %s not found.", post_id)
+        return
+    if post.status != Post.PostStatus.PROCESSING or post.instagram_media_id:
+        logger.info("Post #%s is no longer waiting to publish. Aborting duplicate task.", post.post_number)
+        return
+
+    # --- RATE LIMIT ---
+    # Over Instagram's publishing allowance the post waits in the queue (still PROCESSING)
+    # instead of being sent and failing.
+    # The deferral is a fresh message rather than self.retry(), so waiting for a token never
+    # uses up the retry budget (or inflates the backoff) reserved for Graph network errors.
+    allowed, wait = instagram_publish_bucket.acquire()
+    if not allowed:
+        countdown = min(int(wait) + 1, MAX_RATE_LIMIT_COUNTDOWN)
+        logger.info("Publish limit reached. Post #%s deferred for %ss.", post.post_number, countdown)
+        self.apply_async(args=(post_id, image_url), countdown=countdown)
+        return
+
+    try:
         # --- PUBLISH TO INSTAGRAM ---
-        print(f"Publishing to Instagram for Post #{post.post_number}...")
+        logger.info("Publishing to Instagram for Post #%s...", post.post_number)
 
-        clean_text = re.sub(r'(?<!\S)@\w+', ' ', post.text_content)
+        clean_text = _MENTION_RE.sub(' ', post.text_content)
 
         caption = (
             f"📢 Post #{post.post_number}\n\n"
             f"{clean_text}\n\n"
             f"👤 Submitted by: {post.user.name}\n\n"
-            f"Shared anonymously on LoudSurrey.\n"
-            f"⚠️ Disclaimer: We did not create this content and are not responsible for any resulting harm."
-            f"\n\n #surreybc #newtonsurrey #surreycentral #strawberryhill #punjabiincanada #surreypind #internationalstudents #kpu #gediroute #surreylife #surreywale"
+            f"{_CAPTION_TAIL}"
         )
 
         result = instagram_uploader.publish_to_instagram(image_url, caption)
         
-        # --- 3. SAVE RESULT (Atomic Lock Again) ---
-        with transaction.atomic():
-            # Re-lock to safely update final status.
-            # This ensures we don't overwrite a status if another process somehow intervened.
-            post = Post.objects.select_for_update().get(id=post_id)
-            
-            # Double check: did someone else finish it while we were uploading?
-            if post.status == Post.PostStatus.POSTED:
-                print(f"Post #{post.post_number} was finished by another worker. Skipping save.")
-                return
-
-            if result['success']:
-                post.status = Post.PostStatus.POSTED
-                post.instagram_media_id = result['media_id']
-                post.posted_at = timezone.now()
-                post.meta_api_error = None
-                post.meta_api_status = 200
-                post.save()
-                print(f"Successfully processed and published Post #{post.post_number}.")
-            else:
-                post.status = Post.PostStatus.FAILED
-                post.meta_api_error = result['error']
-                post.meta_api_status = result['status_code']
-                post.save()
-                print(f"Failed to publish Post #{post.post_number}. Error: {result['error']}")
+        # --- SAVE RESULT ---
+        # Compare-and-swap: a single UPDATE that only applies while the post is still PROCESSING,
+        # instead of re-locking the row after the slow network calls. If it matches nothing,
+        # another worker (or an admin) already moved the post on and their outcome stands.
+        if result['success']:
+            final_fields = {
+                'status': Post.PostStatus.POSTED,
+                'instagram_media_id': result['media_id'],
+                'posted_at': timezone.now(),
+                'meta_api_error': None,
+                'meta_api_status': 200,
+            }
+        else:
+            final_fields = {
+                'status': Post.PostStatus.FAILED,
+                'meta_api_error': result['error'],
+                'meta_api_status': result['status_code'],
+            }
+        updated = Post.objects.filter(id=post_id, status=Post.PostStatus.PROCESSING).update(**final_fields)
+
+        if updated != 1:
+            logger.info("Post #%s is no longer PROCESSING; another worker finished it. Skipping save.", post.post_number)
+        elif result['success']:
+            logger.info("Successfully processed and published Post #%s.", post.post_number)
+        else:
+            logger.warning("Failed to publish Post #%s. Error: %s", post.post_number, result['error'])
 
+    except requests.RequestException:
+        # Left to autoretry_for; PublishPostTask.on_failure marks the post FAILED if retries run out
+        raise
     except Exception as e:
-        print(f"Error in process_and_publish_post for {post_id}: {e}")
+        logger.exception("Error in publish_post_image for %s", post_id)
         _fail_post(post_id, str(e))
 
+@shared_task
+def dispatch_due_posts(batch_size=500):
+    """
+    Celery beat task: hands SCHEDULED posts whose time has come to process_and_publish_post.
+    Scheduling lives in the DB (scheduled_time is indexed) rather than as far-future ETA
+    tasks held in worker memory. Each post is claimed with a conditional UPDATE, so
+    overlapping runs can never dispatch the same post twice.
+    """
+    due_ids = list(
+        Post.objects.filter(
+            status=Post.PostStatus.SCHEDULED,
+            scheduled_time__lte=timezone.now()
+        ).order_by('scheduled_time').values_list('id', flat=True)[:batch_size]
+    )
+    for post_id in due_ids:
+        claimed = Post.objects.filter(id=post_id, status=Post.PostStatus.SCHEDULED).update(
+            status=Post.PostStatus.PROCESSING
+        )
+        if claimed:
+            process_and_publish_post.delay(post_id)
+
 def _fail_post(post_id, error_message):
-    """Helper to safely mark post as failed inside a lock."""
+    """Helper to safely mark post as failed (a single UPDATE, atomic on its own)."""
     try:
-        with transaction.atomic():
-            post = Post.objects.select_for_update().get(id=post_id)
-            post.status = Post.PostStatus.FAILED
-            post.meta_api_error = error_message
-            post.save()
+        Post.objects.filter(id=post_id).update(
+            status=Post.PostStatus.FAILED, meta_api_error=error_message
+        )
     except Exception:
         pass
\ No newline at end of file
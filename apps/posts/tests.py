@@ -1,3 +1,177 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.users.models import User
+
+from .models import Post, PostImage
+from .services.rate_limiter import TokenBucket
+from .tasks import dispatch_due_posts, publish_post_image
+
+
+class TokenBucketTests(SimpleTestCase):
+    def setUp(self):
+        self.script = mock.Mock()
+        self.redis = mock.Mock()
+        self.redis.register_script.return_value = self.script
+        patcher = mock.patch('apps.posts.services.rate_limiter.get_redis', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.bucket = TokenBucket('test', capacity=25, period=24 * 60 * 60)
+
+    def test_allowed_when_a_token_is_available(self):
+        self.script.return_value = [1, b'0']
+        self.assertEqual(self.bucket.acquire(), (True, 0.0))
+
+    def test_reports_wait_when_empty(self):
+        self.script.return_value = [0, b'3456.5']
+        self.assertEqual(self.bucket.acquire(), (False, 3456.5))
+
+    def test_passes_capacity_and_refill_rate_to_the_script(self):
+        self.script.return_value = [1, b'0']
+        self.bucket.acquire()
+        kwargs = self.script.call_args.kwargs
+        self.assertEqual(kwargs['keys'], ['ratelimit:test'])
+        capacity, rate, _now = kwargs['args']
+        self.assertEqual(capacity, 25)
+        self.assertAlmostEqual(rate, 25 / (24 * 60 * 60))
+
+    def test_script_is_registered_once(self):
+        self.script.return_value = [1, b'0']
+        self.bucket.acquire()
+        self.bucket.acquire()
+        self.redis.register_script.assert_called_once()
+
+    def test_fails_open_when_redis_is_unavailable(self):
+        self.script.side_effect = ConnectionError
+        self.assertEqual(self.bucket.acquire(), (True, 0))
+
+
+class RecentPostsListViewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(name='tester')
+        self.posted = Post.objects.create(user=self.user, text_content='hello', status=Post.PostStatus.POSTED)
+        PostImage.objects.create(post=self.posted, image_url='https://cdn.example.com/1.png', is_text_image=True)
+        PostImage.objects.create(post=self.posted, image_url='https://cdn.example.com/2.png')
+        self.processing = Post.objects.create(user=self.user, text_content='pending', status=Post.PostStatus.PROCESSING)
+        Post.objects.create(user=self.user, text_content='later', status=Post.PostStatus.SCHEDULED)
+        Post.objects.create(user=self.user, text_content='unpaid', status=Post.PostStatus.AWAITING_PAYMENT)
+
+    def test_feed_is_a_count_a_page_and_one_image_prefetch(self):
+        # Any serializer field outside the .only() lists would cost an extra query per row
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('posts-api:recent-posts'))
+        self.assertEqual(response.status_code, 200)
+
+        body = response.json()
+        self.assertEqual(body['count'], 2)
+        results = {item['post_number']: item for item in body['results']}
+        self.assertEqual(set(results), {self.posted.post_number, self.processing.post_number})
+
+        posted = results[self.posted.post_number]
+        self.assertEqual(
+            set(posted), {'post_number', 'user_name', 'text_content', 'status', 'posted_at', 'images'}
+        )
+        self.assertEqual(posted['user_name'], 'tester')
+        self.assertEqual(posted['text_content'], 'hello')
+        self.assertEqual(posted['status'], Post.PostStatus.POSTED)
+        self.assertCountEqual(posted['images'], [
+            {'image_url': 'https://cdn.example.com/1.png', 'is_text_image': True},
+            {'image_url': 'https://cdn.example.com/2.png', 'is_text_image': False},
+        ])
+        self.assertEqual(results[self.processing.post_number]['images'], [])
+
+
+class DispatchDuePostsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(name='tester')
+        patcher = mock.patch('apps.posts.tasks.process_and_publish_post.delay')
+        self.delay = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _post(self, status, minutes_ago=5):
+        return Post.objects.create(
+            user=self.user, text_content='hello', status=status,
+            scheduled_time=timezone.now() - timedelta(minutes=minutes_ago),
+        )
+
+    def test_claims_and_dispatches_due_posts(self):
+        post = self._post(Post.PostStatus.SCHEDULED)
+        dispatch_due_posts()
+        self.delay.assert_called_once_with(post.id)
+        post.refresh_from_db()
+        self.assertEqual(post.status, Post.PostStatus.PROCESSING)
+
+    def test_already_claimed_post_is_not_dispatched(self):
+        self._post(Post.PostStatus.PROCESSING)
+        dispatch_due_posts()
+        self.delay.assert_not_called()
+
+    def test_repeated_run_does_not_dispatch_again(self):
+        post = self._post(Post.PostStatus.SCHEDULED)
+        dispatch_due_posts()
+        dispatch_due_posts()
+        self.delay.assert_called_once_with(post.id)
+
+    def test_overlapping_runs_dispatch_each_post_once(self):
+        first = self._post(Post.PostStatus.SCHEDULED, minutes_ago=10)
+        second = self._post(Post.PostStatus.SCHEDULED, minutes_ago=5)
+
+        # A second beat run starts after the first has read its batch but before it claims
+        # the second post; the outer run's claim of that post must then match nothing.
+        def overlapping_run(post_id):
+            if self.delay.call_count == 1:
+                dispatch_due_posts()
+        self.delay.side_effect = overlapping_run
+
+        dispatch_due_posts()
+        self.assertEqual(sorted(c.args[0] for c in self.delay.call_args_list), sorted([first.id, second.id]))
+
+
+class PublishPostImageTests(TestCase):
+    IMAGE_URL = 'https://cdn.example.com/post.png'
+
+    def setUp(self):
+        self.user = User.objects.create(name='tester')
+        self.post = Post.objects.create(user=self.user, text_content='hello', status=Post.PostStatus.PROCESSING)
+        bucket = mock.patch('apps.posts.tasks.instagram_publish_bucket')
+        self.bucket = bucket.start()
+        self.addCleanup(bucket.stop)
+        self.bucket.acquire.return_value = (True, 0.0)
+        publish = mock.patch('apps.posts.tasks.instagram_uploader.publish_to_instagram')
+        self.publish = publish.start()
+        self.addCleanup(publish.stop)
+        self.publish.return_value = {'success': True, 'media_id': '111', 'error': None, 'status_code': 200}
+
+    def test_publishes_a_processing_post(self):
+        publish_post_image(self.post.id, self.IMAGE_URL)
+        self.publish.assert_called_once()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.status, Post.PostStatus.POSTED)
+        self.assertEqual(self.post.instagram_media_id, '111')
+
+    def test_posted_post_is_not_published_again(self):
+        Post.objects.filter(id=self.post.id).update(status=Post.PostStatus.POSTED, instagram_media_id='111')
+        publish_post_image(self.post.id, self.IMAGE_URL)
+        self.publish.assert_not_called()
+        self.bucket.acquire.assert_not_called()
+
+    def test_redelivered_task_publishes_once(self):
+        publish_post_image(self.post.id, self.IMAGE_URL)
+        publish_post_image(self.post.id, self.IMAGE_URL)
+        self.publish.assert_called_once()
+
+    def test_result_is_not_saved_over_another_workers_outcome(self):
+        # Another worker finishes the post while this one is waiting on the Graph API
+        def finished_elsewhere(image_url, caption):
+            Post.objects.filter(id=self.post.id).update(status=Post.PostStatus.POSTED, instagram_media_id='222')
+            return {'success': True, 'media_id': '111', 'error': None, 'status_code': 200}
+        self.publish.side_effect = finished_elsewhere
+
+        publish_post_image(self.post.id, self.IMAGE_URL)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.status, Post.PostStatus.POSTED)
+        self.assertEqual(self.post.instagram_media_id, '222')
@@ -1,12 +1,18 @@
+import logging
 import os
 import yt_dlp
-import requests
-import time
 from celery import shared_task
 from django.conf import settings
 from django.utils.crypto import get_random_string
 
-@shared_task(bind=True)
+from apps.posts.services.instagram_uploader import (
+    graph_session, REQUEST_TIMEOUT, MEDIA_URL, MEDIA_PUBLISH_URL, wait_for_media_processing
+)
+
+logger = logging.getLogger(__name__)
+
+# The reposter page polls this task's state, so it keeps its results despite CELERY_TASK_IGNORE_RESULT
+@shared_task(bind=True, ignore_result=False)
 def repost_to_instagram_task(self, target_link):
     """
     Progress States: 
@@ -17,8 +23,7 @@ def repost_to_instagram_task(self, target_link):
     # 1. Prepare Storage
     self.update_state(state='PROGRESS', meta={'status': 'Initializing...'})
     folder_path = os.path.join(settings.MEDIA_ROOT, 'reposter_temp')
-    if not os.path.exists(folder_path):
-        os.makedirs(folder_path)
+    os.makedirs(folder_path, exist_ok=True)
     
     filename = f"repost_{get_random_string(10)}"
     file_path_base = os.path.join(folder_path, filename)
@@ -30,7 +35,13 @@ def repost_to_instagram_task(self, target_link):
         ydl_opts = {
             'outtmpl': f'{file_path_base}.%(ext)s',
             'quiet': True,
-            'format': 'best'
+            'format': 'best[filesize<100M]/best',
+            'noplaylist': True,
+            # Larger reads/ranges than the 8 KB defaults, and parallel fragments for DASH/HLS reels
+            'http_chunk_size': 10 * 1024 * 1024,
+            'buffersize': 1024 * 1024,
+            'concurrent_fragment_downloads': 8,
+            'retries': 5,
         }
         
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
@@ -50,7 +61,7 @@ def repost_to_instagram_task(self, target_link):
         hashtags = "\n\n#surrey #loudsurrey #surreybc #surreylife #repost #desivibes"
         caption = f"{info.get('description', '')}{hashtags}"
 
-        base_url = f"https://graph.facebook.com/{settings.GRAPH_API_VERSION}/{settings.INSTAGRAM_BUSINESS_ACCOUNT_ID}/media"
+        base_url = MEDIA_URL
         
         payload = {
             'caption': caption,
@@ -64,35 +75,24 @@ def repost_to_instagram_task(self, target_link):
             payload['image_url'] = public_media_url
 
         # Step A: Create Container
-        res = requests.post(base_url, data=payload).json()
+        res = graph_session().post(base_url, data=payload, timeout=REQUEST_TIMEOUT).json()
         container_id = res.get('id')
         
         if not container_id:
             return {'status': 'Failed', 'error': res}
 
-        # Step B: Wait for Instagram to process the local file
-        processed = False
-        for _ in range(15):
-            check = requests.get(
-                f"https://graph.facebook.com/{settings.GRAPH_API_VERSION}/{container_id}",
-                params={'fields': 'status_code', 'access_token': settings.ACCESS_TOKEN}
-            ).json()
-            if check.get('status_code') == 'FINISHED':
-                processed = True
-                break
-            elif check.get('status_code') == 'ERROR':
-                return {'status': 'Failed', 'error': 'Meta API processing error'}
-            time.sleep(5)
+        # Step B: Wait for Instagram to process the local file (videos can take a while)
+        processed, processing_error = wait_for_media_processing(container_id, settings.ACCESS_TOKEN, timeout=75)
 
         if not processed:
-            return {'status': 'Failed', 'error': 'Instagram processing timeout'}
+            return {'status': 'Failed', 'error': processing_error}
 
         # Step C: Publish
-        publish_url = f"https://graph.facebook.com/{settings.GRAPH_API_VERSION}/{settings.INSTAGRAM_BUSINESS_ACCOUNT_ID}/media_publish"
-        final_res = requests.post(publish_url, data={
+        publish_url = MEDIA_PUBLISH_URL
+        final_res = graph_session().post(publish_url, data={
             'creation_id': container_id,
             'access_token': settings.ACCESS_TOKEN
-        }).json()
+        }, timeout=REQUEST_TIMEOUT).json()
 
         return {'status': 'Successfully Posted', 'media_id': final_res.get('id')}
 
@@ -105,6 +105,6 @@ def repost_to_instagram_task(self, target_link):
         if full_local_path and os.path.exists(full_local_path):
             try:
                 os.remove(full_local_path)
-                print(f"Cleaned up temporary file: {full_local_path}")
+                logger.info("Cleaned up temporary file: %s", full_local_path)
             except Exception as cleanup_error:
-                print(f"Failed to delete temp file: {cleanup_error}")
\ No newline at end of file
+                logger.warning("Failed to delete temp file: %s", cleanup_error)
\ No newline at end of file
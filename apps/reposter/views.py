@@ -1,9 +1,67 @@
+import hashlib
+import time
+from datetime import datetime, timezone
+
+from django.core.cache import cache
+from django.http import HttpResponse
 from django.shortcuts import render
+from django.template.loader import get_template
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from rest_framework.views import APIView
 from rest_framework.response import Response
+from celery import current_app
 from celery.result import AsyncResult
 from .tasks import repost_to_instagram_task
 
+# Resolved once at import; rendering still goes through the engine so target_link stays autoescaped
+_PROCESS_TEMPLATE = get_template('reposter/process.html')
+
+REPOST_TASK_EXPIRES = 600
+
+STATUS_CACHE_TTL = 2  # Seconds a task snapshot is served before asking the result backend again
+
+
+def _status_snapshot(task_id):
+    """
+    Returns the last known (status, info) for a task, hitting the result
+    backend at most once per STATUS_CACHE_TTL. The snapshot outlives that
+    window so an unchanged state keeps its original Last-Modified.
+    """
+    cache_key = f'reposter_status_{task_id}'
+    snapshot = cache.get(cache_key)
+    if snapshot and time.time() - snapshot['fetched_at'] < STATUS_CACHE_TTL:
+        return snapshot
+
+    task_result = AsyncResult(task_id)
+    info = task_result.info
+    if isinstance(info, Exception):
+        info = str(info)
+    status = task_result.status
+    info_hash = hashlib.md5(repr(info).encode(), usedforsecurity=False).hexdigest()
+    etag = f'{status}:{info_hash}'
+
+    now = time.time()
+    modified_at = snapshot['modified_at'] if snapshot and snapshot['etag'] == etag else now
+    snapshot = {
+        'status': status,
+        'info': info,
+        'etag': etag,
+        'modified_at': modified_at,
+        'fetched_at': now,
+    }
+    cache.set(cache_key, snapshot, timeout=600)
+    return snapshot
+
+
+def _status_etag(request, task_id):
+    return _status_snapshot(task_id)['etag']
+
+
+def _status_last_modified(request, task_id):
+    return datetime.fromtimestamp(_status_snapshot(task_id)['modified_at'], tz=timezone.utc)
+
+
 class ReposterStartView(APIView):
     # We remove the JSON restriction to allow HTML rendering
     def get(self, request):
@@ -12,18 +70,27 @@ class ReposterStartView(APIView):
             return render(request, 'reposter/error.html', {"error": "No link provided."})
         
         # Start the background task
-        task = repost_to_instagram_task.delay(link)
+        # Publish over a pooled broker connection; a repost nobody picked up within
+        # REPOST_TASK_EXPIRES is dropped by the worker instead of running late
+        with current_app.producer_or_acquire() as producer:
+            task = repost_to_instagram_task.apply_async(
+                args=[link], producer=producer, expires=REPOST_TASK_EXPIRES
+            )
         
         # Render the interactive processing page, passing the task ID
-        return render(request, 'reposter/process.html', {
+        return HttpResponse(_PROCESS_TEMPLATE.render({
             "task_id": task.id,
             "target_link": link
-        })
+        }, request))
 
 class ReposterStatusView(APIView):
+    # Identical polls are answered with 304 from the cached snapshot
+    @method_decorator(condition(etag_func=_status_etag, last_modified_func=_status_last_modified))
     def get(self, request, task_id):
-        task_result = AsyncResult(task_id)
-        return Response({
-            "status": task_result.status,
-            "info": task_result.info if task_result.info else {"status": "Waiting..."}
-        })
\ No newline at end of file
+        snapshot = _status_snapshot(task_id)
+        response = Response({
+            "status": snapshot['status'],
+            "info": snapshot['info'] if snapshot['info'] else {"status": "Waiting..."}
+        })
+        response['Cache-Control'] = 'private, max-age=1'
+        return response
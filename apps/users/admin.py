@@ -28,6 +28,12 @@ class UserActivityLogAdmin(admin.ModelAdmin):
     list_filter = ('action', 'timestamp')
     search_fields = ('user__name', 'action')
     readonly_fields = ('user', 'action', 'timestamp')
+
+    def get_queryset(self, request):
+        # Join the user in one query; only the columns User.__str__ renders are loaded
+        return super().get_queryset(request).select_related('user').only(
+            'id', 'action', 'timestamp', 'user__name', 'user__tracking_cookie'
+        )
     
     # Disabling the ability to add logs from the admin, as they should be system-generated
     def has_add_permission(self, request):
@@ -11,12 +11,4 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = User
-        fields = ['name']
-
-class UserDisplaySerializer(serializers.ModelSerializer):
-    """
-    Serializer for displaying basic user information back to the client.
-    """
-    class Meta:
-        model = User
-        fields = ['name', 'is_hard_blocked']
\ No newline at end of file
+        fields = ['name']
\ No newline at end of file
@@ -6,7 +6,11 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
 from ..services import user_service
-from .serializers import UserRegistrationSerializer, UserDisplaySerializer
+from .serializers import UserRegistrationSerializer
+
+def _user_payload(user):
+    """Basic user information returned to the client; a plain dict keeps serializer overhead off every status poll."""
+    return {'name': user.name, 'is_hard_blocked': user.is_hard_blocked}
 
 class UserRegistrationView(APIView):
     """
@@ -24,14 +28,19 @@ class UserRegistrationView(APIView):
         try:
             # The service call is now wrapped in a try/except block
             # to catch the validation errors we added.
+            had_cookie = user_service.COOKIE_NAME in request.COOKIES
             user, created = user_service.get_or_create_user(request, name=name)
 
             if not user:
                  return Response({"error": "Could not create or identify user."}, status=status.HTTP_400_BAD_REQUEST)
 
-            response_serializer = UserDisplaySerializer(user)
-            response = Response(response_serializer.data, status=status.HTTP_201_CREATED)
-            user_service.set_user_cookie(response, user)
+            response = Response(
+                _user_payload(user),
+                status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+            )
+            # A returning browser already holds this cookie; don't resend it
+            if created or not had_cookie:
+                user_service.set_user_cookie(response, user)
             return response
             
         except ValidationError as e:
@@ -48,11 +57,11 @@ class UserStatusView(APIView):
     permission_classes = [AllowAny]
 
     def get(self, request, *args, **kwargs):
-        user, created = user_service.get_or_create_user(request, name=None)
-
-        if user:
-            serializer = UserDisplaySerializer(user)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+        # First-time visitors and bots have no cookie; answer them without the service call
+        if request.COOKIES.get(user_service.COOKIE_NAME):
+            user, created = user_service.get_or_create_user(request, name=None)
+            if user:
+                return Response(_user_payload(user), status=status.HTTP_200_OK)
         
         return Response(
             {"error": "User not found. Please register."},
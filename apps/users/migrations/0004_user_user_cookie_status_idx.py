@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-16 12:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_alter_user_last_seen_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['tracking_cookie'], include=('id', 'name', 'is_hard_blocked'), name='user_cookie_status_idx'),
+        ),
+    ]
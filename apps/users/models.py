@@ -1,7 +1,10 @@
 # apps/users/models.py
 
 import uuid
+from django.core.cache import cache
 from django.db import models
+from django.utils import timezone
+from django.utils.functional import cached_property
 
 class User(models.Model):
     """
@@ -44,12 +47,43 @@ class User(models.Model):
     )
     
     created_at = models.DateTimeField(auto_now_add=True)
-    last_seen_at = models.DateTimeField(auto_now=True)
+    # Maintained by the debounced touch_user_seen task, not auto_now, so reads never cause row writes
+    last_seen_at = models.DateTimeField(default=timezone.now)
 
     def __str__(self):
         # Show first 8 chars of UUID for a cleaner admin display
         return f"{self.name} ({str(self.tracking_cookie)[:8]})"
 
+    class Meta:
+        indexes = [
+            # Covers the cookie lookup (USER_LOOKUP_FIELDS) so Postgres can answer it with an index-only scan
+            models.Index(
+                fields=['tracking_cookie'],
+                include=['id', 'name', 'is_hard_blocked'],
+                name='user_cookie_status_idx',
+            ),
+        ]
+
+    @cached_property
+    def tracking_cookie_str(self):
+        # The hyphenated form every issued cookie already uses
+        return str(self.tracking_cookie)
+
+    @staticmethod
+    def lookup_cache_key(tracking_cookie):
+        return f'user_lookup_{tracking_cookie}'
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # Drop this process's cookie lookup snapshot. The default cache is per-process, so other
+        # workers may serve the old values until USER_LOOKUP_CACHE_TTL expires; anything that
+        # must honour a block immediately re-reads it with user_service.is_hard_blocked().
+        cache.delete(self.lookup_cache_key(self.tracking_cookie))
+
+    def delete(self, *args, **kwargs):
+        cache.delete(self.lookup_cache_key(self.tracking_cookie))
+        return super().delete(*args, **kwargs)
+
 
 class UserActivityLog(models.Model):
     """
@@ -60,7 +94,8 @@ class UserActivityLog(models.Model):
         max_length=100, 
         help_text="Description of the action (e.g., 'submit_post', 'payment_initiated')."
     )
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Set explicitly rather than auto_now_add: buffered logs are inserted later with their event time
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)
 
     class Meta:
         ordering = ['-timestamp']
@@ -0,0 +1,27 @@
+# apps/users/services/fastlookup.py
+
+import uuid
+from django.db import connection
+from ..models import User
+
+# Same columns, in the same order, as user_service.USER_LOOKUP_FIELDS
+_USER_BY_COOKIE_SQL = (
+    f'SELECT id, name, tracking_cookie, is_hard_blocked FROM {User._meta.db_table} '
+    'WHERE tracking_cookie = %s'
+)
+
+def user_by_cookie(tracking_id):
+    """
+    Returns the (id, name, tracking_cookie, is_hard_blocked) row for a tracking cookie,
+    or None. A plain cursor query skips queryset compilation and model setup; going through
+    Django's cursor keeps its connection health checks and error wrapping.
+    Malformed cookies return None instead of sending an invalid UUID to Postgres.
+    """
+    try:
+        tracking_uuid = uuid.UUID(str(tracking_id))
+    except ValueError:
+        return None
+
+    with connection.cursor() as cur:
+        cur.execute(_USER_BY_COOKIE_SQL, [tracking_uuid])
+        return cur.fetchone()
@@ -1,30 +1,60 @@
 # apps/users/services/user_service.py
 
+import ipaddress
+import json
+import logging
+import time
+from functools import lru_cache
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
+from django.utils import timezone
+from apps.core.services.redis_client import get_redis
 from ..models import User, UserActivityLog
+from ..tasks import ACTIVITY_LOG_BUFFER_KEY, touch_user_seen
+from .fastlookup import user_by_cookie
 from apps.moderation.services.content_validator import check_for_blocked_words
 
+logger = logging.getLogger(__name__)
+
 COOKIE_NAME = 'user_tracking_id'
 COOKIE_MAX_AGE = 365 * 24 * 60 * 60  # One year in seconds
 
 # Hardcoded list of reserved names (uses a set for fast lookups).
-RESERVED_NAMES = {'admin', 'loudsurrey'}
+RESERVED_NAMES = frozenset({'admin', 'loudsurrey'})
+
+# A returning user's last_seen_at is written at most once per window.
+LAST_SEEN_DEBOUNCE_SECONDS = 5 * 60
+
+# user id -> monotonic time until which this process won't ask Redis again. Cleared
+# wholesale when it grows past the cap; that only costs a few extra SET NX calls.
+_LOCAL_SEEN_UNTIL: dict[int, float] = {}
+_LOCAL_SEEN_MAX_ENTRIES = 10_000
+
+# Columns loaded when identifying a user by cookie (the display serializer, the block check, the cookie),
+# in model field order as User.from_db expects.
+USER_LOOKUP_FIELDS = ('id', 'name', 'tracking_cookie', 'is_hard_blocked')
+
+# Seconds a cookie -> user snapshot is served from cache before re-reading the row.
+USER_LOOKUP_CACHE_TTL = 60
+
+# Translation table that strips whitespace in a single pass.
+_STRIP_WS = str.maketrans('', '', ' \t\n\r')
 
 def validate_username(name: str):
     """
     Performs all validation checks for a new username.
     Raises a ValidationError with a user-friendly message if any check fails.
     """
-    if not name or not name.strip():
+    if not (name and name.strip()):
         raise ValidationError("Name cannot be empty.")
-        
+
     # 1. Length Check
     if len(name) > 10:
         raise ValidationError("Name cannot be longer than 10 characters.")
 
     # 2. Hardcoded Reserved Names Check (case-insensitive)
-    # We remove spaces to catch names like 'Loud Surrey'.
-    normalized_name = name.replace(" ", "").lower()
+    # We remove whitespace to catch names like 'Loud Surrey'.
+    normalized_name = name.translate(_STRIP_WS).lower()
     if normalized_name in RESERVED_NAMES:
         raise ValidationError(f"The name '{name}' is not allowed.")
 
@@ -35,14 +65,25 @@ def validate_username(name: str):
     # If all checks pass, we're good to go.
     return None
 
+@lru_cache(maxsize=1024)
+def _is_valid_ip(ip):
+    try:
+        ipaddress.ip_address(ip)
+    except ValueError:
+        return False
+    return True
+
 def get_client_ip(request):
     """Utility function to get the user's IP address from the request."""
     x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
     if x_forwarded_for:
-        ip = x_forwarded_for.split(',')[0]
-    else:
-        ip = request.META.get('REMOTE_ADDR')
-    return ip
+        # Only the first hop is needed, so don't split the whole chain
+        ip, _, _ = x_forwarded_for.partition(',')
+        ip = ip.strip()
+        if _is_valid_ip(ip):
+            return ip
+    # A missing or malformed header falls back to the socket address
+    return request.META.get('REMOTE_ADDR')
 
 def get_or_create_user(request, name=None):
     """
@@ -53,10 +94,9 @@ def get_or_create_user(request, name=None):
     created = False
 
     if tracking_id:
-        try:
-            user = User.objects.get(tracking_cookie=tracking_id)
-        except User.DoesNotExist:
-            pass
+        user = _lookup_user_by_cookie(tracking_id)
+        if user is not None:
+            mark_user_seen(user)
 
     if user is None and name:
         # --- THIS IS THE KEY CHANGE ---
@@ -73,22 +113,89 @@ def get_or_create_user(request, name=None):
             initial_user_agent=user_agent
         )
         created = True
-        log_user_activity(user, "user_created")
+        # Account creation is an audit record, so it is written synchronously
+        log_user_activity(user, "user_created", critical=True)
 
     return user, created
 
+def _lookup_user_by_cookie(tracking_id):
+    """
+    Returns the user for a tracking cookie, or None. The looked-up columns are cached
+    briefly and rebuilt with User.from_db, so the instance behaves like a normal
+    .only() result (other fields load on access). User.save() clears the entry in its
+    own process only; other processes may serve it until USER_LOOKUP_CACHE_TTL expires.
+    """
+    cache_key = User.lookup_cache_key(tracking_id)
+    values = cache.get(cache_key)
+    if values is not None:
+        return User.from_db('default', USER_LOOKUP_FIELDS, values)
+
+    # Only the columns callers read, via a raw cursor query; anything else is loaded on first access
+    values = user_by_cookie(tracking_id)
+    if values is None:
+        return None
+    cache.set(cache_key, values, USER_LOOKUP_CACHE_TTL)
+    return User.from_db('default', USER_LOOKUP_FIELDS, values)
+
+def is_hard_blocked(user):
+    """
+    Reads the block flag straight from the database. The cookie lookup may be served from
+    another process's cache for up to USER_LOOKUP_CACHE_TTL, so a block set in the admin
+    would not reach it in time; writes that a block must stop check this instead.
+    """
+    return bool(User.objects.filter(pk=user.pk).values_list('is_hard_blocked', flat=True).first())
+
+def mark_user_seen(user):
+    """
+    Queues a last_seen_at update unless one was queued for this user within the
+    debounce window. A process-local check answers repeat polls without a network
+    round trip; only when it has lapsed does the atomic SET NX in Redis, shared by
+    all processes, decide whether to enqueue.
+    """
+    now = time.monotonic()
+    if _LOCAL_SEEN_UNTIL.get(user.id, 0) > now:
+        return
+    if len(_LOCAL_SEEN_UNTIL) >= _LOCAL_SEEN_MAX_ENTRIES:
+        _LOCAL_SEEN_UNTIL.clear()
+    _LOCAL_SEEN_UNTIL[user.id] = now + LAST_SEEN_DEBOUNCE_SECONDS
+
+    try:
+        if get_redis().set(f'users:seen:{user.id}', 1, nx=True, ex=LAST_SEEN_DEBOUNCE_SECONDS):
+            touch_user_seen.delay(user.id)
+    except Exception as e:
+        logger.warning("Could not record last seen for user %s: %s", user.id, e)
+
 def set_user_cookie(response, user):
     """Attaches the user tracking cookie to the HTTP response."""
     response.set_cookie(
         COOKIE_NAME,
-        value=str(user.tracking_cookie),
+        value=user.tracking_cookie_str,
         max_age=COOKIE_MAX_AGE,
         httponly=True,
         samesite='None',
         secure=True
     )
 
-def log_user_activity(user, action_description):
-    """A helper function to create a new UserActivityLog entry."""
-    if user and isinstance(user, User):
-        UserActivityLog.objects.create(user=user, action=action_description)
\ No newline at end of file
+def log_user_activity(user, action_description, critical=False):
+    """
+    A helper function to record a new UserActivityLog entry.
+    Events are buffered in Redis and bulk-inserted by the flush_activity_logs beat task.
+    Critical audit events skip the buffer and are written immediately, as is any event
+    while Redis is unreachable.
+    """
+    if not (user and isinstance(user, User)):
+        return
+
+    if not critical:
+        event = json.dumps({
+            'user_id': user.id,
+            'action': action_description,
+            'timestamp': timezone.now().isoformat(),
+        })
+        try:
+            get_redis().rpush(ACTIVITY_LOG_BUFFER_KEY, event)
+            return
+        except Exception as e:
+            logger.warning("Activity log buffer unavailable, writing directly: %s", e)
+
+    UserActivityLog.objects.create(user=user, action=action_description)
@@ -0,0 +1,91 @@
+# apps/users/tasks.py
+
+import json
+import logging
+from celery import shared_task
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from apps.core.services.redis_client import get_redis
+from .models import User, UserActivityLog
+
+logger = logging.getLogger(__name__)
+
+ACTIVITY_LOG_BUFFER_KEY = 'users:activity_log_buffer'
+# Events claimed by a flush but not yet committed to Postgres. They are only deleted
+# after bulk_create succeeds, so a DB error or a killed worker leaves them for the next run.
+ACTIVITY_LOG_PROCESSING_KEY = 'users:activity_log_processing'
+ACTIVITY_LOG_FLUSH_LOCK_KEY = 'users:activity_log_flush_lock'
+FLUSH_LOCK_TIMEOUT = 300
+
+# Moves up to ARGV[1] events from the buffer onto the processing list in one atomic step
+_CLAIM_BATCH_LUA = """
+local items = redis.call('LRANGE', KEYS[1], 0, tonumber(ARGV[1]) - 1)
+if #items > 0 then
+    redis.call('RPUSH', KEYS[2], unpack(items))
+    redis.call('LTRIM', KEYS[1], #items, -1)
+end
+return items
+"""
+
+def _write_activity_logs(raw_events, batch_size):
+    """Bulk-inserts one batch of buffered events; returns how many rows were written."""
+    events = []
+    for raw in raw_events:
+        try:
+            events.append(json.loads(raw))
+        except ValueError:
+            logger.warning("Dropping malformed buffered activity log: %r", raw)
+    # Users deleted since the event was buffered would violate the foreign key
+    live_user_ids = set(
+        User.objects.filter(id__in={e['user_id'] for e in events}).values_list('id', flat=True)
+    )
+    logs = [
+        UserActivityLog(user_id=e['user_id'], action=e['action'], timestamp=parse_datetime(e['timestamp']))
+        for e in events if e['user_id'] in live_user_ids
+    ]
+    UserActivityLog.objects.bulk_create(logs, batch_size=batch_size)
+    return len(logs)
+
+@shared_task
+def flush_activity_logs(batch_size=500, max_batches=20):
+    """
+    Celery beat task: drains activity log events buffered in Redis by log_user_activity
+    and writes them with one bulk INSERT per batch instead of one INSERT per event.
+    Each batch is moved atomically to a processing list and only removed from Redis once
+    it is committed, so a failed run loses nothing: the next run writes the leftover batch
+    first (at-least-once; a crash between commit and cleanup can repeat one batch).
+    A lock keeps overlapping beat runs from sharing the processing list.
+    """
+    redis_client = get_redis()
+    if not redis_client.set(ACTIVITY_LOG_FLUSH_LOCK_KEY, 1, nx=True, ex=FLUSH_LOCK_TIMEOUT):
+        return 0
+
+    flushed = 0
+    try:
+        leftover = redis_client.lrange(ACTIVITY_LOG_PROCESSING_KEY, 0, -1)
+        if leftover:
+            flushed += _write_activity_logs(leftover, batch_size)
+            redis_client.delete(ACTIVITY_LOG_PROCESSING_KEY)
+
+        claim_batch = redis_client.register_script(_CLAIM_BATCH_LUA)
+        for _ in range(max_batches):
+            raw_events = claim_batch(keys=[ACTIVITY_LOG_BUFFER_KEY, ACTIVITY_LOG_PROCESSING_KEY], args=[batch_size])
+            if not raw_events:
+                break
+
+            flushed += _write_activity_logs(raw_events, batch_size)
+            redis_client.delete(ACTIVITY_LOG_PROCESSING_KEY)
+
+            if len(raw_events) < batch_size:
+                break
+    finally:
+        redis_client.delete(ACTIVITY_LOG_FLUSH_LOCK_KEY)
+
+    if flushed:
+        logger.info("Flushed %d buffered activity logs", flushed)
+    return flushed
+
+@shared_task
+def touch_user_seen(user_id):
+    """Records a visit with a single-column UPDATE; callers debounce it per user."""
+    User.objects.filter(pk=user_id).update(last_seen_at=timezone.now())
@@ -1,3 +1,118 @@
+from collections import defaultdict
+from datetime import timedelta
+from unittest import mock
+
+from django.db import DatabaseError
 from django.test import TestCase
+from django.utils import timezone
+
+from .models import User, UserActivityLog
+from .services import user_service
+from .tasks import ACTIVITY_LOG_BUFFER_KEY, ACTIVITY_LOG_PROCESSING_KEY, flush_activity_logs
+
+
+class FakeRedis:
+    """In-memory stand-in for the Redis commands the activity log buffer uses."""
+
+    def __init__(self):
+        self.lists = defaultdict(list)
+        self.strings = {}
+
+    def rpush(self, key, *values):
+        self.lists[key].extend(v.encode() if isinstance(v, str) else v for v in values)
+        return len(self.lists[key])
+
+    def lrange(self, key, start, end):
+        items = self.lists[key]
+        return items[start:len(items) if end == -1 else end + 1]
+
+    def ltrim(self, key, start, end):
+        items = self.lists[key]
+        self.lists[key] = items[start:len(items) if end == -1 else end + 1]
+        return True
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.strings:
+            return None
+        self.strings[key] = value
+        return True
+
+    def delete(self, key):
+        self.lists.pop(key, None)
+        self.strings.pop(key, None)
+
+    def register_script(self, script):
+        # Only the batch-claim script is registered; mirror its LRANGE/RPUSH/LTRIM
+        def claim_batch(keys, args):
+            items = self.lrange(keys[0], 0, int(args[0]) - 1)
+            if items:
+                self.rpush(keys[1], *items)
+                self.ltrim(keys[0], len(items), -1)
+            return items
+        return claim_batch
+
+
+class ActivityLogBufferTests(TestCase):
+    def setUp(self):
+        self.redis = FakeRedis()
+        for target in ('apps.users.services.user_service.get_redis', 'apps.users.tasks.get_redis'):
+            patcher = mock.patch(target, return_value=self.redis)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.user = User.objects.create(name='tester')
+
+    def test_events_are_buffered_until_flushed(self):
+        user_service.log_user_activity(self.user, 'submit_post')
+        user_service.log_user_activity(self.user, 'payment_initiated')
+        self.assertFalse(UserActivityLog.objects.exists())
+
+        self.assertEqual(flush_activity_logs(), 2)
+        self.assertEqual(
+            sorted(UserActivityLog.objects.values_list('action', flat=True)),
+            ['payment_initiated', 'submit_post'],
+        )
+        self.assertEqual(self.redis.lists[ACTIVITY_LOG_BUFFER_KEY], [])
+
+    def test_flush_drains_the_buffer_in_batches(self):
+        for i in range(5):
+            user_service.log_user_activity(self.user, f'action_{i}')
+
+        self.assertEqual(flush_activity_logs(batch_size=2), 5)
+        self.assertEqual(UserActivityLog.objects.count(), 5)
+
+    def test_flush_keeps_the_event_time(self):
+        event_time = timezone.now() - timedelta(minutes=5)
+        with mock.patch('apps.users.services.user_service.timezone.now', return_value=event_time):
+            user_service.log_user_activity(self.user, 'submit_post')
+
+        flush_activity_logs()
+        self.assertEqual(UserActivityLog.objects.get().timestamp, event_time)
+
+    def test_events_for_deleted_users_are_skipped(self):
+        user_service.log_user_activity(self.user, 'submit_post')
+        self.user.delete()
+
+        self.assertEqual(flush_activity_logs(), 0)
+        self.assertFalse(UserActivityLog.objects.exists())
+
+    def test_writes_directly_when_redis_is_unavailable(self):
+        with mock.patch('apps.users.services.user_service.get_redis', side_effect=ConnectionError):
+            user_service.log_user_activity(self.user, 'submit_post')
+        self.assertEqual(UserActivityLog.objects.get().action, 'submit_post')
+
+    def test_failed_flush_keeps_the_batch_for_the_next_run(self):
+        user_service.log_user_activity(self.user, 'submit_post')
+        with mock.patch.object(UserActivityLog.objects, 'bulk_create', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                flush_activity_logs()
+        self.assertFalse(UserActivityLog.objects.exists())
+        self.assertEqual(len(self.redis.lists[ACTIVITY_LOG_PROCESSING_KEY]), 1)
+
+        self.assertEqual(flush_activity_logs(), 1)
+        self.assertEqual(UserActivityLog.objects.get().action, 'submit_post')
+        self.assertEqual(self.redis.lists[ACTIVITY_LOG_PROCESSING_KEY], [])
 
-# Create your tests here.
+    def test_critical_events_are_written_immediately(self):
+        user_service.log_user_activity(self.user, 'user_created', critical=True)
+        self.assertEqual(UserActivityLog.objects.get().action, 'user_created')
+        self.assertEqual(self.redis.lists[ACTIVITY_LOG_BUFFER_KEY], [])
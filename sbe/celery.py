@@ -2,6 +2,8 @@
 
 import os
 from celery import Celery
+from celery.signals import worker_process_shutdown
+from .log_handlers import flush_queued_handlers
 
 # Set the default Django settings module for the 'celery' program.
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sbe.settings')
@@ -13,4 +15,10 @@ app = Celery('sbe')
 app.config_from_object('django.conf:settings', namespace='CELERY')
 
 # Auto-discover tasks in all of your applications.
-app.autodiscover_tasks()
\ No newline at end of file
+app.autodiscover_tasks()
+
+
+@worker_process_shutdown.connect
+def _flush_queued_logs(**kwargs):
+    # Prefork children exit via os._exit, so atexit never drains the queued log handler
+    flush_queued_handlers()
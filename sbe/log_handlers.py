@@ -0,0 +1,60 @@
+# /sbe/log_handlers.py
+
+import atexit
+import os
+import queue
+import weakref
+from logging import StreamHandler
+from logging.handlers import QueueHandler, QueueListener
+
+# Live handlers, so worker shutdown hooks can drain them (see flush_queued_handlers)
+_HANDLERS = weakref.WeakSet()
+
+
+def flush_queued_handlers():
+    """
+    Synchronously writes out everything still queued and stops the listener threads.
+    For processes that exit without running atexit, like Celery prefork children
+    recycled by max_tasks_per_child (they leave through os._exit).
+    """
+    for handler in list(_HANDLERS):
+        handler._stop_listener()
+
+
+class QueuedStreamHandler(QueueHandler):
+    """
+    Formats records on the calling thread and hands them to a background
+    QueueListener that does the actual stream write, so logging from a request
+    or task is a queue put instead of a blocking write to stderr.
+    """
+    def __init__(self):
+        super().__init__(queue.SimpleQueue())
+        self._target = StreamHandler()
+        self._start_listener()
+        _HANDLERS.add(self)
+        atexit.register(self._stop_listener)
+        # Gunicorn/Celery fork workers after settings are loaded; the listener
+        # thread doesn't survive the fork, so each child starts its own on a
+        # fresh queue (anything still queued belongs to the parent).
+        os.register_at_fork(after_in_child=self._restart_in_child)
+
+    def _restart_in_child(self):
+        self.queue = queue.SimpleQueue()
+        self._start_listener()
+
+    def emit(self, record):
+        if self._listener is None:
+            # Listener already stopped for shutdown: nothing would drain the queue, write directly
+            self._target.handle(self.prepare(record))
+            return
+        super().emit(record)
+
+    def _start_listener(self):
+        self._listener = QueueListener(self.queue, self._target, respect_handler_level=True)
+        self._listener.start()
+
+    def _stop_listener(self):
+        # Idempotent: both the worker shutdown hook and atexit may call this
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
@@ -37,6 +37,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'django_extensions',
 
     # Third-party apps
@@ -128,6 +129,11 @@ DATABASES = {
         'PASSWORD': config('DB_PASSWORD'),
         'HOST': config('DB_HOST', default='localhost'),
         'PORT': config('DB_PORT', default='5432'),
+        # Persistent connections, so requests don't pay a TLS handshake and login to Postgres each time.
+        # Web only: the Procfile sets DB_CONN_MAX_AGE=0 for Celery, where every gevent greenlet
+        # would otherwise keep its own connection open and exhaust max_connections.
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=60, cast=int),
+        'CONN_HEALTH_CHECKS': True,
         'OPTIONS': {
             'sslmode': config('DB_SSLMODE', default='require')
         },
@@ -157,6 +163,12 @@ REST_FRAMEWORK = {
     # You can also set AllowAny as the default for now
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
+    ],
+
+    # orjson for API responses; the browsable API is kept for browsers
+    'DEFAULT_RENDERER_CLASSES': [
+        'apps.core.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
     ]
 }
 
@@ -174,10 +186,74 @@ CELERY_REDIS_BACKEND_USE_SSL = {
 }
 
 
+# Nothing reads post, beat or user task results, so they are not written to Redis at all.
+# Tasks whose state is polled opt back in with ignore_result=False.
+CELERY_TASK_IGNORE_RESULT = True
+CELERY_RESULT_EXPIRES = 60 * 60
+
+# Producers share a bounded pool of broker connections instead of opening one per publish
+CELERY_BROKER_POOL_LIMIT = 20
+
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 
+# Slow Graph API work gets its own queues so a post stuck polling Instagram can't hold up
+# the beat poller or other fast tasks on the default queue. Those tasks are almost entirely
+# network waits, so their worker runs on gevent (Celery monkey-patches before loading tasks).
+# Post image rendering is CPU-bound Pillow work that would stall every greenlet on that pool,
+# so it has its own queue on the prefork worker and hands off to the Graph task when done.
+# A routed queue only drains if a worker consumes it: the workers are defined in the Procfile.
+CELERY_TASK_ROUTES = {
+    'apps.posts.tasks.process_and_publish_post': {'queue': 'render'},
+    'apps.posts.tasks.publish_post_image': {'queue': 'instagram'},
+    'apps.reposter.tasks.repost_to_instagram_task': {'queue': 'reposter'},
+}
+# Reserve one task at a time: a long publish must not sit on prefetched messages another
+# worker process could run.
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+CELERY_WORKER_MAX_TASKS_PER_CHILD = 100
+# Keep the LOGGING config below in workers; by default Celery replaces the root handlers
+# with its own, so module loggers would bypass the queued handler there.
+CELERY_WORKER_HIJACK_ROOT_LOGGER = False
+
+# Scheduled posts are stored in the DB and released by this poller (run `celery beat`).
+CELERY_BEAT_SCHEDULE = {
+    'dispatch-due-posts': {
+        'task': 'apps.posts.tasks.dispatch_due_posts',
+        'schedule': 30.0,
+    },
+    'flush-activity-logs': {
+        'task': 'apps.users.tasks.flush_activity_logs',
+        'schedule': 5.0,
+    },
+}
+
+
+# --- LOGGING ---
+# Records are queued and written by a background thread (see sbe/log_handlers.py)
+# so request and task code never blocks on stream I/O. Celery workers use this config
+# too (CELERY_WORKER_HIJACK_ROOT_LOGGER is off).
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'default': {
+            'format': '%(asctime)s %(levelname)s %(name)s: %(message)s',
+        },
+    },
+    'handlers': {
+        'queued_console': {
+            'class': 'sbe.log_handlers.QueuedStreamHandler',
+            'formatter': 'default',
+        },
+    },
+    'root': {
+        'handlers': ['queued_console'],
+        'level': 'INFO',
+    },
+}
+
 
 # Internationalization
 LANGUAGE_CODE = 'en-us'
@@ -198,7 +274,9 @@ AWS_ACCESS_KEY_ID = config('AWS_ACCESS_KEY_ID')
 AWS_SECRET_ACCESS_KEY = config('AWS_SECRET_ACCESS_KEY')
 AWS_STORAGE_BUCKET_NAME = config('S3_BUCKET_NAME')
 AWS_S3_REGION_NAME = config('AWS_REGION_NAME')
-AWS_S3_CUSTOM_DOMAIN = f'{AWS_STORAGE_BUCKET_NAME}.s3.amazonaws.com'
+# Point this at a CloudFront distribution in front of the bucket (e.g. dxxxxx.cloudfront.net) so
+# Instagram fetches uploaded media from a nearby edge cache instead of the bucket's region.
+AWS_S3_CUSTOM_DOMAIN = config('AWS_S3_CUSTOM_DOMAIN', default=f'{AWS_STORAGE_BUCKET_NAME}.s3.amazonaws.com')
 AWS_S3_OBJECT_PARAMETERS = {'CacheControl': 'max-age=86400'}
 # AWS_DEFAULT_ACL = 'public-read'
 
@@ -206,6 +284,7 @@ AWS_S3_OBJECT_PARAMETERS = {'CacheControl': 'max-age=86400'}
 INSTAGRAM_BUSINESS_ACCOUNT_ID = config('IG_BUSINESS_ACCOUNT_ID')
 ACCESS_TOKEN = config('IG_PAGE_ACCESS_TOKEN')
 GRAPH_API_VERSION = 'v24.0' # Note: Use a recent, valid version like v19.0 or v20.0
+INSTAGRAM_PUBLISH_LIMIT = config('INSTAGRAM_PUBLISH_LIMIT', default=25, cast=int) # API-published posts per rolling 24h
 
 # Stripe Configuration
 STRIPE_PUBLISHABLE_KEY = config('STRIPE_PUBLISHABLE_KEY')